@@ -1,25 +1,47 @@
+import time
+
 from fastapi import Depends, HTTPException
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 
-from app.db.repositories.user_repository import get_user_by_username
+from app.auth.revocation import is_revoked
+from app.db.repositories.user_repository import (
+    UserRecord,
+    get_user_record,
+    invalidate_user,
+)
 from app.db.database import get_db
+from app.utils.cache import (
+    AUTH_CACHE_EVICTIONS,
+    AUTH_CACHE_HITS,
+    AUTH_CACHE_MISSES,
+    LocalCache,
+)
 from app.utils.config import settings
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# Claims (sub, role, jti, exp) of tokens already verified, kept until
+# their expiry
+token_cache = LocalCache(
+    max_entries=settings.AUTH_TOKEN_CACHE_SIZE,
+    max_bytes=0,
+    hits=AUTH_CACHE_HITS.labels("token"),
+    misses=AUTH_CACHE_MISSES.labels("token"),
+    evictions=AUTH_CACHE_EVICTIONS.labels("token"),
+)
 
-# Extracts the current user from the JWT token
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-):
-    # Predefined exception for failed authentication
-    credentials_exception = HTTPException(
-        status_code=401,
-        detail="Invalid credentials",
-    )
+
+# Verify a JWT and return its (username, role, jti, exp) claims. A token
+# seen before is served from the cache, which expires it at its own exp;
+# revoked tokens are rejected either way.
+def verify_token(token: str, credentials_exception: HTTPException):
+    claims = token_cache.get(token)
+    if claims is not None:
+        if is_revoked(claims[2]):
+            raise credentials_exception
+        return claims
 
     try:
         # Decode the JWT token
@@ -28,18 +50,59 @@ def get_current_user(
             settings.SECRET_KEY,
             algorithms=[settings.ALGORITHM]
         )
-        # Extract username from the token payload
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
     except JWTError:
         # Raise exception if token is invalid or tampered
         raise credentials_exception
 
-    # Fetch the user from the database by username
-    user = get_user_by_username(db, username)
+    # Extract username from the token payload
+    username: str = payload.get("sub")
+    if username is None:
+        raise credentials_exception
+
+    claims = (
+        username, payload.get("role"), payload.get("jti"), payload.get("exp")
+    )
+    if is_revoked(claims[2]):
+        raise credentials_exception
+    if claims[3] is not None:
+        token_cache.set(token, claims, claims[3] - time.time())
+    return claims
+
+
+# Extracts the current user from the JWT token
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> UserRecord:
+    # Predefined exception for failed authentication
+    credentials_exception = HTTPException(
+        status_code=401,
+        detail="Invalid credentials",
+    )
+
+    username, role, _, _ = verify_token(token, credentials_exception)
+
+    # In stateless mode the verified claims are trusted as they are
+    if settings.AUTH_STATELESS:
+        if role is None:
+            raise credentials_exception
+        return UserRecord(None, username, role)
+
+    # Fetch the user by username, reloading a cached snapshot whose role
+    # no longer matches a freshly issued token
+    user = get_user_record(db, username)
+    if user is not None and role is not None and user.role != role:
+        invalidate_user(username)
+        user = get_user_record(db, username)
     if user is None:
         raise credentials_exception
 
     # Return the user object if everything is valid
     return user
+
+
+# Extracts the current user and requires the admin role
+def get_current_admin(user=Depends(get_current_user)):
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin role required")
+    return user
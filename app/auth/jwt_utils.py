@@ -1,3 +1,4 @@
+import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
@@ -14,6 +15,8 @@ class JWTUtils:
             minutes=expires_minutes or settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
         to_encode["exp"] = expire
+        # Unique token id, so a single token can be revoked
+        to_encode["jti"] = uuid.uuid4().hex
         return jwt.encode(
             to_encode,
             settings.SECRET_KEY,
@@ -1,8 +1,43 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
 from passlib.context import CryptContext
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.utils.config import settings
+
+
+# Raised when password hashing is saturated: too many requests are waiting,
+# or a request waited longer than PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS
+class PasswordHashingOverloadedError(Exception):
+    pass
 
 
 # Password hashing using bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+)
+
+HASH_PENDING = Gauge(
+    "math_password_hash_pending", "Password hashes queued or running"
+)
+HASH_REJECTED = Counter(
+    "math_password_hash_rejected_total",
+    "Password hashes shed because of overload"
+)
+HASH_QUEUE_SECONDS = Histogram(
+    "math_password_hash_queue_seconds", "Time password hashes spent queued"
+)
+HASH_SECONDS = Histogram(
+    "math_password_hash_seconds", "Time spent hashing passwords"
+)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_pending = 0
 
 
 # Hash a plain password using bcrypt.
@@ -13,3 +48,72 @@ def get_password_hash(password: str) -> str:
 # Verify a plain password against a hashed password.
 def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
+
+
+# Return the dedicated hashing executor, creating it on first use
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            thread_name_prefix="bcrypt",
+        )
+    return _executor
+
+
+# Run a hashing job that gives up if it waited in the queue too long
+def _timed(func: Callable[..., Any], enqueued_at: float, *args: Any) -> Any:
+    started_at = time.monotonic()
+    waited = started_at - enqueued_at
+    HASH_QUEUE_SECONDS.observe(waited)
+    if waited > settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS:
+        raise PasswordHashingOverloadedError("Password hashing timed out.")
+    try:
+        return func(*args)
+    finally:
+        HASH_SECONDS.observe(time.monotonic() - started_at)
+
+
+# Run func(*args) on the bcrypt executor, off the shared request threadpool.
+# At most PASSWORD_HASH_MAX_PENDING jobs are queued or running; others are
+# shed at once. A job still queued after PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS
+# is cancelled and the caller gets the error then, not when a worker frees
+# up; a job that has started is awaited to the end.
+async def run_hashing(func: Callable[..., Any], *args: Any) -> Any:
+    global _pending
+    if _pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        HASH_REJECTED.inc()
+        raise PasswordHashingOverloadedError("Password hashing saturated.")
+
+    _pending += 1
+    HASH_PENDING.inc()
+    try:
+        future = get_executor().submit(_timed, func, time.monotonic(), *args)
+        result = asyncio.wrap_future(future)
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(result),
+                timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS,
+            )
+        except asyncio.TimeoutError:
+            if future.cancel():
+                raise PasswordHashingOverloadedError(
+                    "Password hashing timed out."
+                )
+        return await result
+    except PasswordHashingOverloadedError:
+        HASH_REJECTED.inc()
+        raise
+    finally:
+        _pending -= 1
+        HASH_PENDING.dec()
+
+
+# Hash a password on the bcrypt executor
+async def hash_password_async(password: str) -> str:
+    return await run_hashing(get_password_hash, password)
+
+
+# Verify a password on the bcrypt executor
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await run_hashing(verify_password, plain, hashed)
@@ -0,0 +1,61 @@
+import asyncio
+import time
+from typing import Optional
+
+from app.utils.cache import r
+from app.utils.config import settings
+
+# Sorted set of revoked token ids (jti) scored by the token's exp, so
+# entries can be dropped once the token would have expired anyway
+REVOKED_KEY = "auth:revoked"
+
+_revoked: frozenset = frozenset()
+_sync_task: Optional[asyncio.Task] = None
+
+
+# Whether a token id has been revoked, as of the last sync
+def is_revoked(jti: Optional[str]) -> bool:
+    return jti is not None and jti in _revoked
+
+
+# Revoke a token until its expiry, here at once and on the other replicas
+# at their next sync
+async def revoke_token(jti: str, exp: float):
+    global _revoked
+    _revoked = _revoked | {jti}
+    await r.zadd(REVOKED_KEY, {jti: exp})
+
+
+# Replace the in-process revocation set with the shared one, dropping ids
+# of tokens that have expired
+async def sync_revocations():
+    global _revoked
+    pipe = r.pipeline(transaction=False)
+    pipe.zremrangebyscore(REVOKED_KEY, "-inf", time.time())
+    pipe.zrange(REVOKED_KEY, 0, -1)
+    _, members = await pipe.execute()
+    _revoked = frozenset(
+        m.decode() if isinstance(m, bytes) else m for m in members
+    )
+
+
+async def _sync_loop():
+    while True:
+        try:
+            await sync_revocations()
+        except Exception as e:
+            print(f"[AUTH] Revocation sync failed: {e}")
+        await asyncio.sleep(settings.AUTH_REVOCATION_SYNC_SECONDS)
+
+
+# Start syncing the revocation set every AUTH_REVOCATION_SYNC_SECONDS
+def start_revocation_sync():
+    global _sync_task
+    _sync_task = asyncio.create_task(_sync_loop())
+
+
+def stop_revocation_sync():
+    global _sync_task
+    if _sync_task is not None:
+        _sync_task.cancel()
+        _sync_task = None
@@ -1,14 +1,18 @@
-from fastapi import Request
+from fastapi import HTTPException, Request
 from typing import Optional, Tuple
-from app.auth.jwt_utils import JWTUtils
+from app.auth.dependencies import verify_token
 
 
 def require_user_auth(request: Request) -> Optional[Tuple[str, str]]:
-    # Return (username, role) if a valid JWT is found in cookies, else None
+    # Return (username, role) if a valid, unrevoked JWT is found in
+    # cookies, else None
     token = request.cookies.get("access_token")
     if not token:
         return None
-    user_data = JWTUtils.decode_token(token)
-    if not user_data:
+    try:
+        username, role, _, _ = verify_token(
+            token, HTTPException(status_code=401)
+        )
+    except HTTPException:
         return None
-    return user_data["username"], user_data["role"]
+    return username, role
@@ -0,0 +1,105 @@
+from datetime import date, datetime
+from itertools import islice
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.auth.dependencies import get_current_admin
+from app.db.database import get_db
+from app.db.repositories.rollup_repository import get_rollups
+from app.schemas.log_schemas import (
+    ArchivedLogResponse,
+    LogArchiveResponse,
+    LogRollupResponse,
+)
+from app.services.log_export import (
+    csv_chunks,
+    encode_chunks,
+    iter_export_rows,
+    ndjson_chunks,
+)
+from app.services.log_retention import list_archives, read_archives
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/rollups", response_model=List[LogRollupResponse])
+def list_rollups(
+    granularity: Literal["minute", "hour"] = "hour",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    operation: Optional[str] = None,
+    user: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_db),
+    admin=Depends(get_current_admin),
+):
+    # Return pre-aggregated log counts instead of scanning raw logs
+    return get_rollups(
+        db,
+        granularity=granularity,
+        since=since,
+        until=until,
+        operation=operation,
+        user=user,
+        limit=limit,
+    )
+
+
+@router.get("/archives", response_model=List[LogArchiveResponse])
+def get_archives(admin=Depends(get_current_admin)):
+    # List the daily archive files written by log retention
+    return list_archives()
+
+
+@router.get("/archives/logs", response_model=List[ArchivedLogResponse])
+def query_archives(
+    since: date,
+    until: Optional[date] = None,
+    operation: Optional[str] = None,
+    user: Optional[str] = None,
+    level: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=10000),
+    admin=Depends(get_current_admin),
+):
+    # Read matching records from the archives of the requested days
+    until = until or since
+    if until < since:
+        raise HTTPException(status_code=400, detail="until is before since")
+    records = read_archives(
+        since, until, operation=operation, user=user, level=level
+    )
+    return list(islice(records, limit))
+
+
+@router.get("/logs/export")
+def export_logs(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = False,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    operation: Optional[str] = None,
+    user: Optional[str] = None,
+    level: Optional[str] = None,
+    admin=Depends(get_current_admin),
+):
+    # Stream matching logs in constant memory, straight from the database
+    records = iter_export_rows(
+        since=since, until=until, operation=operation, user=user, level=level
+    )
+    if format == "csv":
+        chunks, media_type = csv_chunks(records), "text/csv"
+    else:
+        chunks, media_type = ndjson_chunks(records), "application/x-ndjson"
+
+    filename = f"logs.{format}"
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        encode_chunks(chunks, compress=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -3,32 +3,27 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
 from app.db.database import get_db
-from app.db.repositories.user_repository import (
-    get_user_by_username,
-    create_user,
-)
-from app.auth.password_utils import (
-    get_password_hash,
-    verify_password,
-)
-from app.auth.jwt_utils import JWTUtils
+from app.auth.dependencies import oauth2_scheme
 from app.schemas.user_schemas import RegisterRequest
+from app.services.auth_service import (
+    UsernameTakenError,
+    authenticate_user,
+    register_user,
+    revoke_access_token,
+)
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
 @router.post("/register")
-def register(data: RegisterRequest, db: Session = Depends(get_db)):
-    # Check if username is already taken
-    existing_user = get_user_by_username(db, data.username)
-    if existing_user:
+async def register(data: RegisterRequest, db: Session = Depends(get_db)):
+    # Create the user unless the username is already taken
+    try:
+        user = await register_user(
+            db, data.username, data.password, data.role
+        )
+    except UsernameTakenError:
         raise HTTPException(status_code=400, detail="Username already taken")
-
-    # Hash the user's password before storing it
-    hashed_password = get_password_hash(data.password)
-
-    # Save the new user in the database
-    user = create_user(db, data.username, hashed_password, data.role)
     return {
         "msg": (
             f"User '{user.username}' registered with role '{user.role}'"
@@ -37,24 +32,30 @@ def register(data: RegisterRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/login")
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db),
 ):
-    # Retrieve user by username
-    user = get_user_by_username(db, form_data.username)
-
-    # Validate credentials
-    if not user or not verify_password(
-        form_data.password, user.hashed_password
-    ):
+    # Validate credentials and issue a token
+    token = await authenticate_user(
+        db, form_data.username, form_data.password
+    )
+    if token is None:
         raise HTTPException(
             status_code=401, detail="Invalid username or password"
         )
-
-    # Generate JWT access token with role and 30min expiry
-    token = JWTUtils.create_access_token(
-        data={"sub": user.username, "role": user.role},
-        expires_minutes=30
-    )
     return {"access_token": token, "token_type": "bearer"}
+
+
+@router.post("/logout")
+async def logout(token: str = Depends(oauth2_scheme)):
+    # Revoke the presented token on every replica until it expires
+    try:
+        username = await revoke_access_token(token)
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(
+            status_code=503, detail="Revocation store unavailable"
+        )
+    return {"msg": f"Token of '{username}' revoked"}
@@ -1,31 +1,99 @@
-from fastapi import APIRouter, Depends
+import asyncio
+import json
+import re
+import secrets
+from collections import Counter
+from typing import Any, Dict, List
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
 
 from app.schemas.math_schemas import (
     MathOperationResponse,
     FibonacciRequest,
     PowRequest,
     FactorialRequest,
+    BatchRequest,
+    BatchResponse,
+    PowArrayRequest,
+    PowArrayResponse,
 )
 from app.services.math_service import (
     calculate_fibonacci,
     calculate_power,
     calculate_factorial,
+    calculate_batch,
+    calculate_power_array,
+    estimate_cost,
+    format_decimal,
+    DECIMAL_INLINE_MAX_BITS,
 )
+from app.services.admission import admission
 from app.auth.dependencies import get_current_user
-from app.db.models.user_model import User
+from app.db.repositories.user_repository import UserRecord
+from app.utils.config import settings
 from app.utils.logger import publish_log, build_log_message
 
 
 router = APIRouter()
 
+# Operation names as reported in responses and logs
+OPERATION_LABELS = {
+    "fibonacci": "fib",
+    "power": "pow",
+    "factorial": "factorial",
+}
 
-@router.post("/fibonacci", response_model=MathOperationResponse)
-def compute_fibonacci(
-    req: FibonacciRequest,
-    current_user: User = Depends(get_current_user),
-):
-    # Compute Fibonacci sequence
-    result = calculate_fibonacci(req.n)
+# Compact array format: little-endian float64 values, (base, exponent)
+# pairs for requests and one result per pair for responses
+BINARY_MEDIA_TYPE = "application/octet-stream"
+
+
+# Serialize a response model to JSON. Integers too long to render on the
+# event loop are converted in the compute pool and spliced in as numbers.
+async def render_response(model: BaseModel) -> Response:
+    marker = secrets.token_hex(8)
+    large: List[int] = []
+    positions: Dict[int, int] = {}
+
+    def extract(value: Any) -> Any:
+        if isinstance(value, dict):
+            return {key: extract(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [extract(item) for item in value]
+        if isinstance(value, int) and \
+                value.bit_length() > DECIMAL_INLINE_MAX_BITS:
+            if value not in positions:
+                positions[value] = len(large)
+                large.append(value)
+            return f"{marker}:{positions[value]}"
+        return value
+
+    body = json.dumps(
+        extract(model.model_dump()),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    )
+    if large:
+        digits = [await format_decimal(value) for value in large]
+        body = re.sub(
+            f'"{marker}:(\\d+)"',
+            lambda match: digits[int(match.group(1))],
+            body,
+        )
+    return Response(content=body, media_type="application/json")
+
+
+# Compute a Fibonacci number within the user's quota and log it
+async def run_fibonacci(
+    req: FibonacciRequest, current_user: UserRecord
+) -> MathOperationResponse:
+    cost = estimate_cost("fibonacci", {"n": req.n})
+    async with admission(current_user.username, cost):
+        result = await calculate_fibonacci(req.n)
 
     # Build and publish log message
     log_message = build_log_message(
@@ -34,7 +102,7 @@ def compute_fibonacci(
         result=result,
         user=current_user.username,
     )
-    publish_log("logs", log_message)
+    await publish_log("logs", log_message)
 
     # Return structured response
     return MathOperationResponse(
@@ -45,22 +113,35 @@ def compute_fibonacci(
     )
 
 
+@router.post("/fibonacci", response_model=MathOperationResponse)
+async def compute_fibonacci(
+    req: FibonacciRequest,
+    current_user: UserRecord = Depends(get_current_user),
+):
+    # Compute Fibonacci sequence and render its decimal result off the loop
+    return await render_response(await run_fibonacci(req, current_user))
+
+
 @router.post("/power", response_model=MathOperationResponse)
-def compute_power(
+async def compute_power(
     req: PowRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: UserRecord = Depends(get_current_user),
 ):
-    # Compute power: base ^ exponent
-    result = calculate_power(req.base, req.exponent)
+    # Compute power: base ^ exponent, within the user's quota
+    input_data = {"base": req.base, "exponent": req.exponent}
+    async with admission(
+        current_user.username, estimate_cost("power", input_data)
+    ):
+        result = await calculate_power(req.base, req.exponent)
 
     # Build and publish log message
     log_message = build_log_message(
         operation="pow",
-        input_data={"base": req.base, "exponent": req.exponent},
+        input_data=input_data,
         result=result,
         user=current_user.username,
     )
-    publish_log("logs", log_message)
+    await publish_log("logs", log_message)
 
     # Return structured response
     return MathOperationResponse(
@@ -71,13 +152,87 @@ def compute_power(
     )
 
 
-@router.post("/factorial", response_model=MathOperationResponse)
-def compute_factorial(
-    req: FactorialRequest,
-    current_user: User = Depends(get_current_user),
+@router.post(
+    "/power/array",
+    response_model=PowArrayResponse,
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {
+                    "schema": PowArrayRequest.model_json_schema()
+                },
+                BINARY_MEDIA_TYPE: {
+                    "schema": {"type": "string", "format": "binary"}
+                },
+            },
+            "required": True,
+        }
+    },
+)
+async def compute_power_array(
+    request: Request,
+    current_user: UserRecord = Depends(get_current_user),
 ):
-    # Compute factorial of a number
-    result = calculate_factorial(req.n)
+    # Parse either packed float64 pairs or a JSON body
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith(BINARY_MEDIA_TYPE):
+        if not body or len(body) % 16:
+            raise HTTPException(
+                status_code=422,
+                detail="Body must hold little-endian float64 pairs.",
+            )
+        pairs = np.frombuffer(body, dtype="<f8").reshape(-1, 2)
+        if len(pairs) > settings.POW_ARRAY_MAX_LENGTH:
+            raise HTTPException(status_code=422, detail="Too many pairs.")
+        bases, exponents = pairs[:, 0], pairs[:, 1]
+    else:
+        try:
+            req = PowArrayRequest.model_validate_json(body)
+        except ValidationError as exc:
+            raise RequestValidationError(exc.errors())
+        bases = np.array(req.bases, dtype=np.float64)
+        exponents = np.array(req.exponents, dtype=np.float64)
+
+    # Compute all powers in one vectorized pass, charging one unit per pair
+    try:
+        async with admission(current_user.username, len(bases)):
+            results = await asyncio.to_thread(
+                calculate_power_array, bases, exponents
+            )
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+    # Build and publish log message
+    log_message = build_log_message(
+        operation="pow_array",
+        input_data={"count": len(results)},
+        result=f"{len(results)} results",
+        user=current_user.username,
+    )
+    await publish_log("logs", log_message)
+
+    # Return packed results if requested, else structured JSON
+    if BINARY_MEDIA_TYPE in request.headers.get("accept", ""):
+        return Response(
+            content=results.astype("<f8").tobytes(),
+            media_type=BINARY_MEDIA_TYPE,
+        )
+    return PowArrayResponse(
+        operation="pow_array",
+        count=len(results),
+        results=results.tolist(),
+        user=current_user.username,
+    )
+
+
+# Compute a factorial within the user's quota and log it
+async def run_factorial(
+    req: FactorialRequest, current_user: UserRecord
+) -> MathOperationResponse:
+    cost = estimate_cost("factorial", {"n": req.n})
+    async with admission(current_user.username, cost):
+        result = await calculate_factorial(req.n)
 
     # Build and publish log message
     log_message = build_log_message(
@@ -86,7 +241,7 @@ def compute_factorial(
         result=result,
         user=current_user.username,
     )
-    publish_log("logs", log_message)
+    await publish_log("logs", log_message)
 
     # Return structured response
     return MathOperationResponse(
@@ -95,3 +250,57 @@ def compute_factorial(
         result=result,
         user=current_user.username,
     )
+
+
+@router.post("/factorial", response_model=MathOperationResponse)
+async def compute_factorial(
+    req: FactorialRequest,
+    current_user: UserRecord = Depends(get_current_user),
+):
+    # Compute factorial of a number and render its result off the loop
+    return await render_response(await run_factorial(req, current_user))
+
+
+@router.post("/batch", response_model=BatchResponse)
+async def compute_batch(
+    req: BatchRequest,
+    current_user: UserRecord = Depends(get_current_user),
+):
+    # Compute all operations, deduplicated, with pipelined cache access
+    operations = [
+        (item.operation, item.model_dump(exclude={"operation"}))
+        for item in req.operations
+    ]
+    unique = {
+        (op, tuple(sorted(data.items()))): data for op, data in operations
+    }
+    cost = sum(estimate_cost(op, data) for (op, _), data in unique.items())
+    async with admission(current_user.username, cost):
+        results = await calculate_batch(operations)
+
+    # Build and publish a single aggregated log message
+    log_message = build_log_message(
+        operation="batch",
+        input_data={
+            "count": len(operations),
+            "unique": len(unique),
+            "operations": dict(Counter(op for op, _ in operations)),
+        },
+        result=f"{len(results)} results",
+        user=current_user.username,
+    )
+    await publish_log("logs", log_message)
+
+    # Return structured response in request order
+    return await render_response(BatchResponse(
+        results=[
+            MathOperationResponse(
+                operation=OPERATION_LABELS[op],
+                input=data,
+                result=result,
+                user=current_user.username,
+            )
+            for (op, data), result in zip(operations, results)
+        ],
+        user=current_user.username,
+    ))
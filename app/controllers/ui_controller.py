@@ -1,7 +1,10 @@
-from typing import Optional
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional, Tuple
 
 from fastapi import (
-    APIRouter, Request, Form, Depends, status
+    APIRouter, Request, Form, Depends, HTTPException, status
 )
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
@@ -9,17 +12,126 @@ from sqlalchemy.orm import Session
 import httpx
 
 from app.utils.config import settings
+from app.auth.dependencies import get_current_user
+from app.auth.password_utils import PasswordHashingOverloadedError
 from app.auth.ui_auth_guard import require_user_auth
+from app.controllers.math_controller import (
+    compute_power,
+    run_factorial,
+    run_fibonacci,
+)
 from app.db.database import get_db
-from app.db.repositories.log_repository import get_paginated_logs
+from app.db.repositories.log_repository import get_logs_page
+from app.db.repositories.rollup_repository import get_rollup_summary
 from app.views.contexts.auth_context import AuthPageContext
 from app.views.contexts.base import BasePageContext
 from app.views.contexts.math_context import MathPageContext
+from app.middleware.error_logging import log_error
+from app.schemas.math_schemas import (
+    FactorialRequest,
+    FibonacciRequest,
+    PowRequest,
+)
+from app.services.admission import AdmissionRejectedError
+from app.services.auth_service import (
+    UsernameTakenError,
+    authenticate_user,
+    register_user,
+    revoke_access_token,
+)
+from app.services.math_service import format_decimal
+from app.services.compute_pool import (
+    ComputeOverloadedError,
+    ComputeTimeoutError,
+)
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/views")
 API_BASE = settings.API_BASE
 
+# Math API handlers and request schemas the forms dispatch to in process
+MATH_HANDLERS = {
+    "fibonacci": (run_fibonacci, FibonacciRequest),
+    "factorial": (run_factorial, FactorialRequest),
+    "power": (compute_power, PowRequest),
+}
+
+# Failures of in-process math calls, with the status the API would return
+MATH_ERRORS = {
+    HTTPException: None,
+    AdmissionRejectedError: 429,
+    ComputeOverloadedError: 503,
+    ComputeTimeoutError: 504,
+}
+
+_api_client: Optional[httpx.AsyncClient] = None
+
+
+# Return the pooled client used to reach a separately deployed API when
+# UI_DISPATCH is "http", creating it on first use
+def get_api_client() -> httpx.AsyncClient:
+    global _api_client
+    if _api_client is None:
+        _api_client = httpx.AsyncClient(
+            base_url=API_BASE,
+            limits=httpx.Limits(
+                max_connections=settings.UI_API_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.UI_API_MAX_CONNECTIONS,
+            ),
+            timeout=settings.UI_API_TIMEOUT_SECONDS,
+        )
+    return _api_client
+
+
+# Close the pooled API client
+async def close_api_client():
+    global _api_client
+    if _api_client is not None:
+        await _api_client.aclose()
+        _api_client = None
+
+
+# Run a math operation for the logged-in user and return (result, error),
+# the result as decimal text. By default the API handler is called in
+# process, sharing its auth, admission and logging; with UI_DISPATCH "http"
+# it goes over the network.
+async def dispatch_math(
+    request: Request,
+    db: Session,
+    operation: str,
+    payload: dict,
+) -> Tuple[Any, Optional[str]]:
+    token = request.cookies.get("access_token")
+    if settings.UI_DISPATCH == "http":
+        response = await get_api_client().post(
+            f"/{operation}",
+            json=payload,
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        if response.status_code != 200:
+            return None, "Request failed, please retry."
+        # Integers stay text: parsing huge ones would stall the loop
+        return json.loads(response.content, parse_int=str)["result"], None
+
+    handler, schema = MATH_HANDLERS[operation]
+    try:
+        user = await asyncio.to_thread(get_current_user, token, db)
+        response = await handler(schema(**payload), current_user=user)
+        result = await format_decimal(response.result)
+    except tuple(MATH_ERRORS) as exc:
+        status_code = next(
+            code for error, code in MATH_ERRORS.items()
+            if isinstance(exc, error)
+        ) or exc.status_code
+        detail = getattr(exc, "detail", None) or str(exc)
+        await log_error(request, status_code, detail)
+        return None, "Request failed, please retry."
+    except Exception as exc:
+        # Anything else would be a 500 from the API; show it on the form
+        await log_error(request, 500, str(exc))
+        return None, "Request failed, please retry."
+    return result, None
+
 
 # Render login + register page
 @router.get("/login", response_class=HTMLResponse)
@@ -33,18 +145,31 @@ def show_auth_form(request: Request):
 async def handle_login(
     request: Request,
     username: str = Form(...),
-    password: str = Form(...)
+    password: str = Form(...),
+    db: Session = Depends(get_db),
 ):
-    data = {"username": username, "password": password}
-    headers = {"Content-Type": "application/x-www-form-urlencoded"}
-
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{API_BASE}/auth/login", data=data, headers=headers
+    if settings.UI_DISPATCH == "http":
+        response = await get_api_client().post(
+            "/auth/login",
+            data={"username": username, "password": password},
         )
-
-    if response.status_code == 200:
-        token = response.json()["access_token"]
+        token = (
+            response.json()["access_token"]
+            if response.status_code == 200 else None
+        )
+    else:
+        try:
+            token = await authenticate_user(db, username, password)
+        except PasswordHashingOverloadedError:
+            context = AuthPageContext(
+                request=request,
+                login_error="Server is busy, please retry."
+            )
+            return templates.TemplateResponse(
+                request, "auth.html", context.to_dict()
+            )
+
+    if token is not None:
         resp = RedirectResponse(url="/math", status_code=status.HTTP_302_FOUND)
         resp.set_cookie(
             key="access_token",
@@ -67,14 +192,26 @@ async def handle_login(
 async def handle_register(
     request: Request,
     username: str = Form(...),
-    password: str = Form(...)
+    password: str = Form(...),
+    db: Session = Depends(get_db),
 ):
-    data = {"username": username, "password": password}
-
-    async with httpx.AsyncClient() as client:
-        response = await client.post(f"{API_BASE}/auth/register", json=data)
-
-    if response.status_code == 200:
+    error = None
+    if settings.UI_DISPATCH == "http":
+        response = await get_api_client().post(
+            "/auth/register",
+            json={"username": username, "password": password},
+        )
+        if response.status_code != 200:
+            error = "Username already taken."
+    else:
+        try:
+            await register_user(db, username, password)
+        except UsernameTakenError:
+            error = "Username already taken."
+        except PasswordHashingOverloadedError:
+            error = "Server is busy, please retry."
+
+    if error is None:
         context = AuthPageContext(
             request=request,
             register_success="User registered successfully."
@@ -82,15 +219,23 @@ async def handle_register(
     else:
         context = AuthPageContext(
             request=request,
-            register_error="Username already taken."
+            register_error=error
         )
 
     return templates.TemplateResponse(request, "auth.html", context.to_dict())
 
 
-# Handle logout: delete cookie
+# Handle logout: revoke the token and delete the cookie
 @router.post("/logout")
-def logout():
+async def logout(request: Request):
+    token = request.cookies.get("access_token")
+    if token:
+        try:
+            await revoke_access_token(token)
+        except HTTPException:
+            pass
+        except Exception as e:
+            print(f"[AUTH] Token revocation failed: {e}")
     response = RedirectResponse(
         url="/login",
         status_code=status.HTTP_302_FOUND
@@ -124,14 +269,13 @@ async def handle_math_forms(
     n: Optional[int] = Form(None),
     base: Optional[float] = Form(None),
     exponent: Optional[float] = Form(None),
+    db: Session = Depends(get_db),
 ):
     auth = require_user_auth(request)
     if not auth:
         return RedirectResponse("/login")
 
     username, role = auth
-    token = request.cookies.get("access_token")
-    headers = {"Authorization": f"Bearer {token}"}
 
     context = MathPageContext(
         request=request,
@@ -140,52 +284,66 @@ async def handle_math_forms(
         role=role
     )
 
-    async with httpx.AsyncClient() as client:
-        if operation == "fibonacci":
-            if n is None or not (0 <= n <= 10000):
-                context.fibonacci_error = "n must be between 0 and 10,000."
-            else:
-                response = await client.post(
-                    f"{API_BASE}/fibonacci", json={"n": n}, headers=headers
+    if operation == "fibonacci":
+        if n is None or not (0 <= n <= settings.FIBONACCI_MAX_N):
+            context.fibonacci_error = (
+                f"n must be between 0 and {settings.FIBONACCI_MAX_N:,}."
+            )
+        else:
+            context.fibonacci_result, context.fibonacci_error = (
+                await dispatch_math(request, db, "fibonacci", {"n": n})
+            )
+
+    elif operation == "factorial":
+        if n is None or not (0 <= n <= settings.FACTORIAL_MAX_N):
+            context.factorial_error = (
+                f"n must be between 0 and {settings.FACTORIAL_MAX_N:,}."
+            )
+        else:
+            context.factorial_result, context.factorial_error = (
+                await dispatch_math(request, db, "factorial", {"n": n})
+            )
+
+    elif operation == "power":
+        if base is None or exponent is None:
+            context.power_error = "Base and exponent are required."
+        elif abs(base) > 1e6 or abs(exponent) > 1000:
+            context.power_error = (
+                "Base must be [-1e6, 1e6] and exponent [-1000, 1000]."
+            )
+        else:
+            context.power_result, context.power_error = (
+                await dispatch_math(
+                    request, db, "power",
+                    {"base": base, "exponent": exponent},
                 )
-                if response.status_code == 200:
-                    context.fibonacci_result = response.json()["result"]
-
-        elif operation == "factorial":
-            if n is None or not (0 <= n <= 1000):
-                context.factorial_error = "n must be between 0 and 1,000."
-            else:
-                response = await client.post(
-                    f"{API_BASE}/factorial", json={"n": n}, headers=headers
-                )
-                if response.status_code == 200:
-                    context.factorial_result = response.json()["result"]
-
-        elif operation == "power":
-            if base is None or exponent is None:
-                context.power_error = "Base and exponent are required."
-            elif abs(base) > 1e6 or abs(exponent) > 1000:
-                context.power_error = (
-                    "Base must be [-1e6, 1e6] and exponent [-1000, 1000]."
-                )
-            else:
-                response = await client.post(
-                    f"{API_BASE}/power",
-                    json={"base": base, "exponent": exponent},
-                    headers=headers
-                )
-                if response.status_code == 200:
-                    context.power_result = response.json()["result"]
+            )
 
     return templates.TemplateResponse(request, "math.html", context.to_dict())
 
 
+# Parse an optional datetime form field; blank or malformed values are
+# treated as no filter
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
 # Render logs page (admin only)
 @router.get("/logs", response_class=HTMLResponse)
 def view_logs(
     request: Request,
     db: Session = Depends(get_db),
-    page: int = 1
+    cursor: Optional[str] = None,
+    user: Optional[str] = None,
+    operation: Optional[str] = None,
+    level: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
 ):
     auth = require_user_auth(request)
     if not auth:
@@ -195,7 +353,26 @@ def view_logs(
     if role != "admin":
         return HTMLResponse(content="Access Denied", status_code=403)
 
-    logs = get_paginated_logs(db, page=page)
+    filters = {
+        "user": user or "",
+        "operation": operation or "",
+        "level": level or "",
+        "since": since or "",
+        "until": until or "",
+    }
+    try:
+        logs, next_cursor = get_logs_page(
+            db,
+            cursor=cursor,
+            user=user,
+            operation=operation,
+            level=level,
+            since=_parse_datetime(since),
+            until=_parse_datetime(until),
+        )
+    except ValueError:
+        return HTMLResponse(content="Invalid cursor", status_code=400)
+
     log_entries = [
         {
             "timestamp": log.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
@@ -217,6 +394,11 @@ def view_logs(
     ).model_dump()
 
     context["logs"] = log_entries
-    context["page"] = page
+    context["filters"] = filters
+    context["cursor"] = cursor
+    context["next_cursor"] = next_cursor
+    context["summary"] = get_rollup_summary(
+        db, since=datetime.now(timezone.utc) - timedelta(hours=24)
+    )
 
     return templates.TemplateResponse(request, "logs.html", context)
@@ -1,11 +1,9 @@
 from app.db.database import Base
 from app.db.database import engine
+from app.db.database import init_db
 from app.db.models.user_model import User
 from app.db.models.log_model import Log
-
-
-def init_db():
-    Base.metadata.create_all(bind=engine)
+from app.db.models.log_rollup_model import LogRollup
 
 
 if __name__ == "__main__":
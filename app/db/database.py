@@ -1,15 +1,57 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.utils.config import settings
 
 
+# Connection pool (pool_size, max_overflow) per process role: the API
+# serves concurrent reads from its threadpool, the log worker is a single
+# writer and needs one connection
+POOL_SIZES = {
+    "api": (8, 8),
+    "worker": (1, 0),
+}
+
+
+# Apply the storage profile to every new SQLite connection. WAL lets
+# readers proceed while the worker writes; synchronous=NORMAL is durable
+# across application crashes in WAL mode and avoids an fsync per commit.
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    if settings.DB_SQLITE_WAL:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={settings.DB_BUSY_TIMEOUT_MS:d}")
+    cursor.execute(f"PRAGMA mmap_size={settings.DB_MMAP_SIZE:d}")
+    cursor.execute(f"PRAGMA cache_size=-{settings.DB_CACHE_SIZE_KB:d}")
+    cursor.close()
+
+
+# Create an engine for the database URL, sized for the process role. File
+# backed SQLite databases get the storage profile; in-memory ones and other
+# backends keep SQLAlchemy's defaults.
+def create_db_engine(url: str, role: str = "api") -> Engine:
+    backend = make_url(url)
+    if backend.get_backend_name() != "sqlite":
+        return create_engine(url)
+    if backend.database in (None, "", ":memory:"):
+        return create_engine(url, connect_args={"check_same_thread": False})
+
+    pool_size, max_overflow = POOL_SIZES[role]
+    db_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        pool_size=settings.DB_POOL_SIZE or pool_size,
+        max_overflow=max_overflow,
+    )
+    event.listen(db_engine, "connect", _apply_sqlite_pragmas)
+    return db_engine
+
+
 # Create SQLAlchemy engine using the configured database URL
-engine = create_engine(
-    settings.db_url,
-    connect_args={"check_same_thread": False}
-)
+engine = create_db_engine(settings.db_url, settings.DB_ROLE)
 
 
 # Session factory for database access
@@ -24,9 +66,12 @@ SessionLocal = sessionmaker(
 Base = declarative_base()
 
 
-# Initialize database tables
+# Initialize database tables, and indexes added to existing tables
 def init_db():
     Base.metadata.create_all(engine)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
 
 
 # Dependency for providing a database session
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
 
 from app.db.database import Base
 
@@ -15,3 +15,13 @@ class Log(Base):
     operation = Column(String(50))
     input = Column(Text)
     result = Column(Text)
+
+    # Composite indexes matching the (timestamp, id) keyset order, alone
+    # and behind the user and operation filters
+    __table_args__ = (
+        Index("ix_logs_timestamp_id", "timestamp", "id"),
+        Index("ix_logs_user_timestamp_id", "user", "timestamp", "id"),
+        Index(
+            "ix_logs_operation_timestamp_id", "operation", "timestamp", "id"
+        ),
+    )
@@ -0,0 +1,37 @@
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+)
+
+from app.db.database import Base
+
+
+# SQLAlchemy model for per-minute and per-hour log counts, maintained by
+# the log worker as it ingests. Missing dimensions are stored as "" so the
+# unique bucket constraint also matches them.
+class LogRollup(Base):
+    __tablename__ = "log_rollups"
+
+    id = Column(Integer, primary_key=True)
+    granularity = Column(String(10), nullable=False)
+    bucket_start = Column(DateTime, nullable=False)
+    operation = Column(String(50), nullable=False, default="")
+    user = Column(String(100), nullable=False, default="")
+    level = Column(String(20), nullable=False, default="")
+    event = Column(String(50), nullable=False, default="")
+    count = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "granularity", "bucket_start", "operation", "user", "level",
+            "event",
+            name="uq_log_rollups_bucket",
+        ),
+        Index("ix_log_rollups_granularity_bucket", "granularity",
+              "bucket_start"),
+    )
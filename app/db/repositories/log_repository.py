@@ -1,14 +1,63 @@
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from app.db.models.log_model import Log
 
 
-# Return one page of newest logs.
-def get_paginated_logs(db: Session, page: int = 1, page_size: int = 20):
-    offset = (page - 1) * page_size
-    return (
-        db.query(Log)
-        .order_by(Log.timestamp.desc())
-        .offset(offset)
-        .limit(page_size)
+# Encode the (timestamp, id) of the last row on a page as an opaque cursor
+def encode_cursor(log: Log) -> str:
+    raw = f"{log.timestamp.isoformat()}|{log.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+# Decode a cursor into (timestamp, id); raises ValueError if malformed
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        timestamp, log_id = raw.split("|")
+        return datetime.fromisoformat(timestamp), int(log_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+# Return one page of newest logs after the cursor, with the cursor of the
+# next page (None on the last page). Keyset pagination over
+# (timestamp, id) keeps every page an index range scan, however deep.
+def get_logs_page(
+    db: Session,
+    cursor: Optional[str] = None,
+    page_size: int = 20,
+    user: Optional[str] = None,
+    operation: Optional[str] = None,
+    level: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Tuple[List[Log], Optional[str]]:
+    query = db.query(Log).filter(Log.timestamp.isnot(None))
+    if user:
+        query = query.filter(Log.user == user)
+    if operation:
+        query = query.filter(Log.operation == operation)
+    if level:
+        query = query.filter(Log.level == level)
+    if since is not None:
+        query = query.filter(Log.timestamp >= since)
+    if until is not None:
+        query = query.filter(Log.timestamp < until)
+    if cursor:
+        query = query.filter(
+            tuple_(Log.timestamp, Log.id) < tuple_(*decode_cursor(cursor))
+        )
+
+    logs = (
+        query.order_by(Log.timestamp.desc(), Log.id.desc())
+        .limit(page_size + 1)
         .all()
     )
+    if len(logs) <= page_size:
+        return logs, None
+    logs = logs[:page_size]
+    return logs, encode_cursor(logs[-1])
@@ -0,0 +1,126 @@
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.db.models.log_rollup_model import LogRollup
+
+
+ROLLUP_GRANULARITIES = ("minute", "hour")
+
+
+# Truncate a timestamp to the start of its minute or hour bucket (naive UTC)
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    timestamp = timestamp.replace(tzinfo=None, second=0, microsecond=0)
+    if granularity == "hour":
+        timestamp = timestamp.replace(minute=0)
+    return timestamp
+
+
+# Aggregate log rows into (granularity, bucket, operation, user, level,
+# event) keys with their (count, error_count)
+def aggregate_rollups(
+    rows: Iterable[Dict[str, Any]]
+) -> Dict[Tuple, Tuple[int, int]]:
+    counts: Counter = Counter()
+    errors: Counter = Counter()
+    for row in rows:
+        dimensions = (
+            row.get("operation") or "",
+            row.get("user") or "",
+            row.get("level") or "",
+            row.get("event") or "",
+        )
+        for granularity in ROLLUP_GRANULARITIES:
+            key = (
+                granularity,
+                bucket_start(row["timestamp"], granularity),
+                *dimensions,
+            )
+            counts[key] += 1
+            if row.get("level") == "ERROR":
+                errors[key] += 1
+    return {key: (counts[key], errors[key]) for key in counts}
+
+
+# Add log rows to the rollup tables (the caller commits)
+def upsert_rollups(db: Session, rows: Iterable[Dict[str, Any]]):
+    values = [
+        {
+            "granularity": granularity,
+            "bucket_start": bucket,
+            "operation": operation,
+            "user": user,
+            "level": level,
+            "event": event,
+            "count": count,
+            "error_count": error_count,
+        }
+        for (granularity, bucket, operation, user, level, event),
+            (count, error_count) in aggregate_rollups(rows).items()
+    ]
+    if not values:
+        return
+    stmt = insert(LogRollup).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            "granularity", "bucket_start", "operation", "user", "level",
+            "event",
+        ],
+        set_={
+            "count": LogRollup.count + stmt.excluded.count,
+            "error_count": LogRollup.error_count + stmt.excluded.error_count,
+        },
+    )
+    db.execute(stmt)
+
+
+# Return rollup rows for a granularity, oldest bucket first
+def get_rollups(
+    db: Session,
+    granularity: str = "hour",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    operation: Optional[str] = None,
+    user: Optional[str] = None,
+    limit: int = 1000,
+) -> List[LogRollup]:
+    query = db.query(LogRollup).filter(LogRollup.granularity == granularity)
+    if since is not None:
+        query = query.filter(LogRollup.bucket_start >= since)
+    if until is not None:
+        query = query.filter(LogRollup.bucket_start < until)
+    if operation is not None:
+        query = query.filter(LogRollup.operation == operation)
+    if user is not None:
+        query = query.filter(LogRollup.user == user)
+    return (
+        query.order_by(LogRollup.bucket_start, LogRollup.id)
+        .limit(limit)
+        .all()
+    )
+
+
+# Return totals per operation since a point in time, busiest first
+def get_rollup_summary(db: Session, since: datetime) -> List[Dict[str, Any]]:
+    rows = (
+        db.query(
+            LogRollup.operation,
+            func.sum(LogRollup.count),
+            func.sum(LogRollup.error_count),
+        )
+        .filter(
+            LogRollup.granularity == "hour",
+            LogRollup.bucket_start >= bucket_start(since, "hour"),
+        )
+        .group_by(LogRollup.operation)
+        .order_by(func.sum(LogRollup.count).desc())
+        .all()
+    )
+    return [
+        {"operation": operation or "-", "count": count, "errors": errors}
+        for operation, count, errors in rows
+    ]
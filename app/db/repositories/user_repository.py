@@ -1,6 +1,34 @@
+from dataclasses import dataclass
+from typing import Optional
+
 from sqlalchemy.orm import Session
 
 from app.db.models.user_model import User
+from app.utils.cache import (
+    AUTH_CACHE_EVICTIONS,
+    AUTH_CACHE_HITS,
+    AUTH_CACHE_MISSES,
+    LocalCache,
+)
+from app.utils.config import settings
+
+
+# Read-only snapshot of a user, safe to share across sessions and requests
+@dataclass(frozen=True)
+class UserRecord:
+    id: Optional[int]
+    username: str
+    role: str
+
+
+# Snapshots of recently authenticated users, by username
+user_cache = LocalCache(
+    max_entries=settings.AUTH_USER_CACHE_SIZE,
+    max_bytes=0,
+    hits=AUTH_CACHE_HITS.labels("user"),
+    misses=AUTH_CACHE_MISSES.labels("user"),
+    evictions=AUTH_CACHE_EVICTIONS.labels("user"),
+)
 
 
 # Retrieve a user from the database by username
@@ -8,6 +36,26 @@ def get_user_by_username(db: Session, username: str) -> User | None:
     return db.query(User).filter(User.username == username).first()
 
 
+# Retrieve a user snapshot, from the cache for up to
+# AUTH_USER_CACHE_TTL_SECONDS after it was loaded
+def get_user_record(db: Session, username: str) -> UserRecord | None:
+    record = user_cache.get(username)
+    if record is None:
+        user = get_user_by_username(db, username)
+        if user is None:
+            return None
+        record = UserRecord(user.id, user.username, user.role)
+        user_cache.set(
+            username, record, settings.AUTH_USER_CACHE_TTL_SECONDS
+        )
+    return record
+
+
+# Forget the cached snapshot of a user that was created or changed
+def invalidate_user(username: str):
+    user_cache.delete(username)
+
+
 # Create a new user and save it to the database
 def create_user(
     db: Session,
@@ -23,4 +71,5 @@ def create_user(
     db.add(user)
     db.commit()
     db.refresh(user)
+    invalidate_user(username)
     return user
@@ -1,20 +1,49 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from prometheus_fastapi_instrumentator import Instrumentator
 
+from app.auth.password_utils import PasswordHashingOverloadedError
+from app.auth.revocation import start_revocation_sync, stop_revocation_sync
 from app.controllers.math_controller import router
 from app.controllers.auth_controller import router as auth_router
+from app.controllers.admin_controller import router as admin_router
 from app.middleware.error_logging import (
     ErrorLoggingMiddleware,
+    catch_admission_rejected,
+    catch_compute_overloaded,
+    catch_compute_timeout,
+    catch_hashing_overloaded,
     catch_http_exceptions,
     catch_validation_errors,
 )
+from app.services.admission import AdmissionRejectedError
+from app.services.compute_pool import (
+    ComputeOverloadedError,
+    ComputeTimeoutError,
+    shutdown_pool,
+)
+from app.utils.logger import start_log_publisher, stop_log_publisher
 from fastapi.templating import Jinja2Templates
 from app.controllers import ui_controller
 
+
+# Start and stop process-wide resources with the application
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_log_publisher()
+    start_revocation_sync()
+    yield
+    stop_revocation_sync()
+    await ui_controller.close_api_client()
+    await stop_log_publisher()
+    shutdown_pool()
+
+
 # app = FastAPI(title=settings.app_name)
-app = FastAPI(debug=True)
+app = FastAPI(debug=True, lifespan=lifespan)
 
 templates = Jinja2Templates(directory="app/views")
 
@@ -30,7 +59,20 @@ app.add_exception_handler(StarletteHTTPException, catch_http_exceptions)
 # Custom handler for request validation errors
 app.add_exception_handler(RequestValidationError, catch_validation_errors)
 
+# Custom handlers for an overloaded or timed-out compute pool
+app.add_exception_handler(ComputeOverloadedError, catch_compute_overloaded)
+app.add_exception_handler(ComputeTimeoutError, catch_compute_timeout)
+
+# Custom handler for requests rejected by admission control
+app.add_exception_handler(AdmissionRejectedError, catch_admission_rejected)
+
+# Custom handler for logins and registrations shed by the bcrypt executor
+app.add_exception_handler(
+    PasswordHashingOverloadedError, catch_hashing_overloaded
+)
+
 # Register application routers
 app.include_router(router)
 app.include_router(auth_router)
+app.include_router(admin_router)
 app.include_router(ui_controller.router)
@@ -4,12 +4,18 @@ from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from starlette.middleware.base import BaseHTTPMiddleware
 
+from app.auth.password_utils import PasswordHashingOverloadedError
+from app.services.admission import AdmissionRejectedError
+from app.services.compute_pool import (
+    ComputeOverloadedError,
+    ComputeTimeoutError,
+)
 from app.utils.logger import publish_log
 
 
 # Log structured error messages to a logging backend
-def log_error(request: Request, status: int, detail: str):
-    publish_log("logs", {
+async def log_error(request: Request, status: int, detail: str):
+    await publish_log("logs", {
         "event": "operation_failed",
         "level": "ERROR",
         "input": {
@@ -26,7 +32,7 @@ class ErrorLoggingMiddleware(BaseHTTPMiddleware):
         try:
             return await call_next(request)
         except Exception as exc:
-            log_error(request, 500, str(exc))
+            await log_error(request, 500, str(exc))
             return JSONResponse(
                 status_code=500,
                 content={"detail": "Internal Server Error"}
@@ -35,7 +41,7 @@ class ErrorLoggingMiddleware(BaseHTTPMiddleware):
 
 # Exception handler for HTTPException (e.g., 404, 403)
 async def catch_http_exceptions(request: Request, exc: StarletteHTTPException):
-    log_error(request, exc.status_code, str(exc.detail))
+    await log_error(request, exc.status_code, str(exc.detail))
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail}
@@ -47,8 +53,61 @@ async def catch_validation_errors(
         request: Request,
         exc: RequestValidationError
         ):
-    log_error(request, 422, str(exc))
+    await log_error(request, 422, str(exc))
     return JSONResponse(
         status_code=422,
         content={"detail": "Validation error"}
     )
+
+
+# Exception handler for computations rejected by an overloaded pool (503)
+async def catch_compute_overloaded(
+        request: Request,
+        exc: ComputeOverloadedError
+        ):
+    await log_error(request, 503, str(exc))
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry later"},
+        headers={"Retry-After": "1"}
+    )
+
+
+# Exception handler for computations past their deadline (504)
+async def catch_compute_timeout(
+        request: Request,
+        exc: ComputeTimeoutError
+        ):
+    await log_error(request, 504, str(exc))
+    return JSONResponse(
+        status_code=504,
+        content={"detail": "Computation exceeded its deadline"}
+    )
+
+
+# Exception handler for logins and registrations shed by the bcrypt
+# executor (503)
+async def catch_hashing_overloaded(
+        request: Request,
+        exc: PasswordHashingOverloadedError
+        ):
+    await log_error(request, 503, str(exc))
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry later"},
+        headers={"Retry-After": "1"}
+    )
+
+
+# Exception handler for requests over their quota or the global
+# concurrency limit (429)
+async def catch_admission_rejected(
+        request: Request,
+        exc: AdmissionRejectedError
+        ):
+    await log_error(request, 429, str(exc))
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
@@ -0,0 +1,36 @@
+from datetime import date, datetime
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+# Response schema for one rollup bucket.
+class LogRollupResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    granularity: str
+    bucket_start: datetime
+    operation: str
+    user: str
+    level: str
+    event: str
+    count: int
+    error_count: int
+
+
+# Response schema for one archive file.
+class LogArchiveResponse(BaseModel):
+    day: date
+    size_bytes: int
+
+
+# Response schema for one archived log record.
+class ArchivedLogResponse(BaseModel):
+    id: int
+    timestamp: Optional[datetime] = None
+    event: Optional[str] = None
+    level: Optional[str] = None
+    user: Optional[str] = None
+    operation: Optional[str] = None
+    input: Optional[str] = None
+    result: Optional[str] = None
@@ -1,15 +1,24 @@
-from typing import Union, Dict
+from typing import Annotated, Dict, List, Literal, Union
 
 from pydantic import BaseModel, Field
 
+from app.utils.config import settings
+
+
+# Value ranges accepted by the power operation
+POW_BASE_LIMIT = 1e6
+POW_EXPONENT_LIMIT = 1000
+
 
 # Request schema for Fibonacci operation.
 class FibonacciRequest(BaseModel):
     n: int = Field(
         ...,
         ge=0,
-        le=10000,
-        description="Input number must be between 0 and 10,000"
+        le=settings.FIBONACCI_MAX_N,
+        description=(
+            f"Input number must be between 0 and {settings.FIBONACCI_MAX_N:,}"
+        )
     )
 
 
@@ -17,25 +26,41 @@ class FibonacciRequest(BaseModel):
 class PowRequest(BaseModel):
     base: float = Field(
         ...,
-        ge=-1e6,
-        le=1e6,
+        ge=-POW_BASE_LIMIT,
+        le=POW_BASE_LIMIT,
         description="Base must be between -1e6 and 1e6"
     )
     exponent: float = Field(
         ...,
-        ge=-1000,
-        le=1000,
+        ge=-POW_EXPONENT_LIMIT,
+        le=POW_EXPONENT_LIMIT,
         description="Exponent must be between -1000 and 1000"
     )
 
 
+# Request schema for Power over arrays of (base, exponent) pairs.
+class PowArrayRequest(BaseModel):
+    bases: List[float] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.POW_ARRAY_MAX_LENGTH,
+    )
+    exponents: List[float] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.POW_ARRAY_MAX_LENGTH,
+    )
+
+
 # Request schema for Factorial operation.
 class FactorialRequest(BaseModel):
     n: int = Field(
         ...,
         ge=0,
-        le=1000,
-        description="Input number must be between 0 and 1,000"
+        le=settings.FACTORIAL_MAX_N,
+        description=(
+            f"Input number must be between 0 and {settings.FACTORIAL_MAX_N:,}"
+        )
     )
 
 
@@ -45,3 +70,48 @@ class MathOperationResponse(BaseModel):
     input: Union[int, Dict[str, float]]
     result: Union[int, float]
     user: str
+
+
+# Batch item schemas reuse the single-operation validation rules.
+class FibonacciBatchItem(FibonacciRequest):
+    operation: Literal["fibonacci"]
+
+
+class PowBatchItem(PowRequest):
+    operation: Literal["power"]
+
+
+class FactorialBatchItem(FactorialRequest):
+    operation: Literal["factorial"]
+
+
+BatchItem = Annotated[
+    Union[FibonacciBatchItem, PowBatchItem, FactorialBatchItem],
+    Field(discriminator="operation"),
+]
+
+
+# Request schema for a batch of mixed operations.
+class BatchRequest(BaseModel):
+    operations: List[BatchItem] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.BATCH_MAX_OPERATIONS,
+        description=(
+            f"Between 1 and {settings.BATCH_MAX_OPERATIONS:,} operations"
+        )
+    )
+
+
+# Response schema for a batch, results in request order.
+class BatchResponse(BaseModel):
+    results: List[MathOperationResponse]
+    user: str
+
+
+# Response schema for Power over arrays, results in input order.
+class PowArrayResponse(BaseModel):
+    operation: str
+    count: int
+    results: List[float]
+    user: str
@@ -0,0 +1,121 @@
+import math
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from prometheus_client import Counter
+
+from app.utils.cache import r
+from app.utils.config import settings
+
+
+# Raised when a request is over its user's quota or the global concurrency
+# limit; retry_after is the number of seconds to wait
+class AdmissionRejectedError(Exception):
+
+    def __init__(self, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.retry_after = retry_after
+
+
+ADMISSION_REJECTED = Counter(
+    "math_admission_rejected_total", "Requests rejected by admission",
+    ["reason"]
+)
+ADMISSION_ERRORS = Counter(
+    "math_admission_errors_total",
+    "Requests admitted unchecked because Redis failed"
+)
+
+# Requests holding a global concurrency slot, scored by lease expiry
+INFLIGHT_KEY = "admission:inflight"
+
+# Atomically refill the user's token bucket and charge the request cost,
+# taking a concurrency slot first when a limit is given. Returns
+# {1, 0} when admitted, {0, ms until enough tokens} when over quota and
+# {0, -1} when every slot is taken.
+_ADMIT_SCRIPT = """
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = math.min(tonumber(ARGV[3]), capacity)
+local limit = tonumber(ARGV[4])
+
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+if tokens < cost then
+    return {0, math.ceil((cost - tokens) / rate * 1000)}
+end
+
+if limit > 0 then
+    redis.call("ZREMRANGEBYSCORE", KEYS[2], "-inf", now)
+    if redis.call("ZCARD", KEYS[2]) >= limit then
+        return {0, -1}
+    end
+    redis.call("ZADD", KEYS[2], now + tonumber(ARGV[6]), ARGV[5])
+end
+
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens - cost), "ts",
+           tostring(now))
+redis.call("EXPIRE", KEYS[1], math.ceil(capacity / rate) + 1)
+return {1, 0}
+"""
+
+
+# Charge a request of the given cost to the user's quota. Requests too
+# heavy to run inline also need one of ADMISSION_MAX_CONCURRENT slots
+# shared by all replicas; the slot id is returned for release. When Redis
+# is unavailable the request is admitted unchecked.
+async def try_admit(user: str, cost: float) -> Optional[str]:
+    if not settings.ADMISSION_ENABLED:
+        return None
+    heavy = cost > settings.COMPUTE_INLINE_MAX_COST
+    slot = uuid.uuid4().hex if heavy else None
+    try:
+        admitted, retry_ms = await r.eval(
+            _ADMIT_SCRIPT,
+            2,
+            f"quota:{user}",
+            INFLIGHT_KEY,
+            settings.ADMISSION_BUCKET_CAPACITY,
+            settings.ADMISSION_REFILL_PER_SECOND,
+            settings.ADMISSION_BASE_COST + cost,
+            settings.ADMISSION_MAX_CONCURRENT if heavy else 0,
+            slot or "",
+            settings.ADMISSION_SLOT_LEASE_SECONDS,
+        )
+    except Exception:
+        ADMISSION_ERRORS.inc()
+        return None
+
+    if admitted:
+        return slot
+    if retry_ms < 0:
+        ADMISSION_REJECTED.labels("concurrency").inc()
+        raise AdmissionRejectedError("Too many expensive requests.", 1)
+    ADMISSION_REJECTED.labels("quota").inc()
+    raise AdmissionRejectedError(
+        "Request quota exceeded.", max(1, math.ceil(retry_ms / 1000))
+    )
+
+
+# Give back a concurrency slot; if this fails the lease expires it
+async def release_slot(slot: str):
+    try:
+        await r.zrem(INFLIGHT_KEY, slot)
+    except Exception:
+        pass
+
+
+# Admit a request for the duration of the block
+@asynccontextmanager
+async def admission(user: str, cost: float) -> AsyncIterator[None]:
+    slot = await try_admit(user, cost)
+    try:
+        yield
+    finally:
+        if slot is not None:
+            await release_slot(slot)
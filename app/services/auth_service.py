@@ -0,0 +1,80 @@
+import asyncio
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.auth.dependencies import token_cache, verify_token
+from app.auth.jwt_utils import JWTUtils
+from app.auth.password_utils import (
+    hash_password_async,
+    verify_password_async,
+)
+from app.auth.revocation import revoke_token
+from app.db.models.user_model import User
+from app.db.repositories.user_repository import (
+    create_user,
+    get_user_by_username,
+)
+
+
+# Raised when registering a username that already exists
+class UsernameTakenError(Exception):
+    pass
+
+
+# Register a user, hashing the password on the bcrypt executor
+async def register_user(
+    db: Session, username: str, password: str, role: str = "user"
+) -> User:
+    # Check if username is already taken
+    existing_user = await asyncio.to_thread(
+        get_user_by_username, db, username
+    )
+    if existing_user:
+        raise UsernameTakenError(username)
+
+    # Hash the user's password before storing it
+    hashed_password = await hash_password_async(password)
+
+    # Save the new user in the database
+    return await asyncio.to_thread(
+        create_user, db, username, hashed_password, role
+    )
+
+
+# Check credentials and return a new access token, or None if they are
+# invalid
+async def authenticate_user(
+    db: Session, username: str, password: str
+) -> Optional[str]:
+    # Retrieve user by username
+    user = await asyncio.to_thread(get_user_by_username, db, username)
+
+    # Validate credentials on the bcrypt executor
+    if not user or not await verify_password_async(
+        password, user.hashed_password
+    ):
+        return None
+
+    # Generate JWT access token with role and 30min expiry
+    return JWTUtils.create_access_token(
+        data={"sub": user.username, "role": user.role},
+        expires_minutes=30
+    )
+
+
+# Revoke an access token on every replica until it expires and return its
+# username. Raises HTTPException for a token that is invalid or cannot be
+# revoked; failures of the revocation store propagate.
+async def revoke_access_token(token: str) -> str:
+    username, _, jti, exp = verify_token(
+        token, HTTPException(status_code=401, detail="Invalid credentials")
+    )
+    if jti is None or exp is None:
+        raise HTTPException(
+            status_code=400, detail="Token cannot be revoked"
+        )
+    token_cache.delete(token)
+    await revoke_token(jti, exp)
+    return username
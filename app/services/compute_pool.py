@@ -0,0 +1,104 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from prometheus_client import Counter, Gauge
+
+from app.utils.config import settings
+
+
+# Raised when the pool already holds the maximum number of pending jobs
+class ComputeOverloadedError(Exception):
+    pass
+
+
+# Raised when a job does not finish before its deadline
+class ComputeTimeoutError(Exception):
+    pass
+
+
+POOL_PENDING = Gauge(
+    "math_compute_pool_pending", "Jobs submitted to the compute pool"
+)
+POOL_REJECTED = Counter(
+    "math_compute_pool_rejected_total", "Jobs rejected because of overload"
+)
+POOL_TIMEOUTS = Counter(
+    "math_compute_pool_timeouts_total", "Jobs abandoned past their deadline"
+)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+# Return the process pool, creating it on first use
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.COMPUTE_POOL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+# Stop the pool, dropping jobs that have not started yet
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+# Free the slot of a job once its future is done (called from the pool's
+# management thread, hence the lock)
+def _release_slot(future=None):
+    global _pending
+    with _pending_lock:
+        _pending -= 1
+    POOL_PENDING.dec()
+
+
+# Run func(*args) in the process pool within a deadline (in seconds).
+# Jobs abandoned by a timeout or a cancelled request are cancelled if they
+# have not started yet. A job that is already running cannot be stopped
+# without killing its worker, so it keeps its slot until it finishes and
+# the overload check never counts fewer jobs than the workers are running.
+async def run_in_pool(
+    func: Callable[..., Any],
+    *args: Any,
+    deadline: Optional[float] = None
+) -> Any:
+    global _pending, _pool
+    with _pending_lock:
+        overloaded = _pending >= settings.COMPUTE_POOL_MAX_PENDING
+        if not overloaded:
+            _pending += 1
+    if overloaded:
+        POOL_REJECTED.inc()
+        raise ComputeOverloadedError("Compute capacity exhausted.")
+
+    POOL_PENDING.inc()
+    try:
+        future = get_pool().submit(func, *args)
+    except BaseException:
+        _release_slot()
+        raise
+    future.add_done_callback(_release_slot)
+
+    try:
+        return await asyncio.wait_for(
+            asyncio.wrap_future(future),
+            timeout=deadline or settings.COMPUTE_DEADLINE_SECONDS,
+        )
+    except asyncio.TimeoutError:
+        POOL_TIMEOUTS.inc()
+        raise ComputeTimeoutError("Computation exceeded its deadline.")
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool for the next job
+        _pool = None
+        raise
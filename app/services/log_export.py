@@ -0,0 +1,87 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy import select
+
+from app.db.database import SessionLocal
+from app.db.models.log_model import Log
+from app.services.log_retention import serialize_log
+
+EXPORT_COLUMNS = [
+    "id", "timestamp", "event", "level", "user", "operation", "input",
+    "result",
+]
+EXPORT_CHUNK_ROWS = 1000
+
+
+# Stream matching logs, oldest first, as plain rows rather than ORM objects
+# so the session never holds more than one yield_per batch. The session is
+# opened here because the response outlives the request's dependencies.
+def iter_export_rows(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    operation: Optional[str] = None,
+    user: Optional[str] = None,
+    level: Optional[str] = None,
+) -> Iterator[dict]:
+    query = select(*(getattr(Log, column) for column in EXPORT_COLUMNS))
+    if since is not None:
+        query = query.where(Log.timestamp >= since)
+    if until is not None:
+        query = query.where(Log.timestamp < until)
+    if operation:
+        query = query.where(Log.operation == operation)
+    if user:
+        query = query.where(Log.user == user)
+    if level:
+        query = query.where(Log.level == level)
+    query = query.order_by(Log.timestamp, Log.id).execution_options(
+        yield_per=EXPORT_CHUNK_ROWS
+    )
+    with SessionLocal() as db:
+        for row in db.execute(query):
+            yield serialize_log(row)
+
+
+# Render records as chunks of NDJSON text
+def ndjson_chunks(records: Iterable[dict]) -> Iterator[str]:
+    lines = []
+    for record in records:
+        lines.append(json.dumps(record) + "\n")
+        if len(lines) >= EXPORT_CHUNK_ROWS:
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
+
+
+# Render records as chunks of CSV text, starting with the header
+def csv_chunks(records: Iterable[dict]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for count, record in enumerate(records, 1):
+        writer.writerow(record)
+        if count % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+# Encode text chunks, gzip-compressing them incrementally when asked
+def encode_chunks(chunks: Iterable[str], compress: bool) -> Iterator[bytes]:
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode()
+        return
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,132 @@
+import gzip
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from app.db.models.log_model import Log
+from app.utils.config import settings
+
+
+# Turn a log row into a JSON-serialisable record for archives and exports
+def serialize_log(log: Log) -> Dict[str, Any]:
+    return {
+        "id": log.id,
+        "timestamp": log.timestamp.isoformat() if log.timestamp else None,
+        "event": log.event,
+        "level": log.level,
+        "user": log.user,
+        "operation": log.operation,
+        "input": log.input,
+        "result": log.result,
+    }
+
+
+# Path of the archive file holding the logs of one day
+def archive_path(day: date) -> str:
+    return os.path.join(
+        settings.LOG_ARCHIVE_DIR, f"logs-{day.isoformat()}.ndjson.gz"
+    )
+
+
+# Append records to a day's archive as a new gzip member and fsync it, so
+# the file only ever grows and earlier members stay readable
+def append_to_archive(day: date, records: List[Dict[str, Any]]):
+    os.makedirs(settings.LOG_ARCHIVE_DIR, exist_ok=True)
+    with open(archive_path(day), "ab") as f:
+        with gzip.GzipFile(fileobj=f, mode="ab") as gz:
+            for record in records:
+                gz.write((json.dumps(record) + "\n").encode())
+        f.flush()
+        os.fsync(f.fileno())
+
+
+# Move logs older than LOG_RETENTION_DAYS into the daily archives. Rows are
+# handled oldest first in chunks of LOG_RETENTION_CHUNK_SIZE, each archived
+# and then deleted in its own short transaction so the worker's inserts and
+# the API's reads are never held up for long. A crash between the two steps
+# archives a chunk twice; readers drop the duplicate ids. At most
+# max_chunks chunks are moved per call, so a large backlog is worked off
+# over several calls. Returns the number of rows moved.
+def archive_old_logs(
+    db: Session,
+    now: Optional[datetime] = None,
+    max_chunks: Optional[int] = None,
+) -> int:
+    now = now or datetime.now(timezone.utc)
+    cutoff = now.replace(tzinfo=None) - timedelta(
+        days=settings.LOG_RETENTION_DAYS
+    )
+    moved = chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        logs = (
+            db.query(Log)
+            .filter(Log.timestamp < cutoff)
+            .order_by(Log.timestamp, Log.id)
+            .limit(settings.LOG_RETENTION_CHUNK_SIZE)
+            .all()
+        )
+        if not logs:
+            return moved
+
+        by_day: Dict[date, List[Dict[str, Any]]] = {}
+        for log in logs:
+            by_day.setdefault(log.timestamp.date(), []).append(
+                serialize_log(log)
+            )
+        for day, records in by_day.items():
+            append_to_archive(day, records)
+
+        db.execute(delete(Log).where(Log.id.in_([log.id for log in logs])))
+        db.commit()
+        db.expunge_all()
+        moved += len(logs)
+        chunks += 1
+    return moved
+
+
+# List the archived days, oldest first, with their file sizes
+def list_archives() -> List[Dict[str, Any]]:
+    if not os.path.isdir(settings.LOG_ARCHIVE_DIR):
+        return []
+    archives = []
+    for name in sorted(os.listdir(settings.LOG_ARCHIVE_DIR)):
+        if not (name.startswith("logs-") and name.endswith(".ndjson.gz")):
+            continue
+        day = date.fromisoformat(name[len("logs-"):-len(".ndjson.gz")])
+        size = os.path.getsize(archive_path(day))
+        archives.append({"day": day, "size_bytes": size})
+    return archives
+
+
+# Stream archived records between two days (inclusive) that match the
+# filters, oldest day first; files are decompressed line by line
+def read_archives(
+    since: date,
+    until: date,
+    operation: Optional[str] = None,
+    user: Optional[str] = None,
+    level: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    day = since
+    while day <= until:
+        path = archive_path(day)
+        if os.path.exists(path):
+            seen = set()
+            with gzip.open(path, "rt") as f:
+                for line in f:
+                    record = json.loads(line)
+                    if record["id"] in seen:
+                        continue
+                    seen.add(record["id"])
+                    if operation and record["operation"] != operation:
+                        continue
+                    if user and record["user"] != user:
+                        continue
+                    if level and record["level"] != level:
+                        continue
+                    yield record
+        day += timedelta(days=1)
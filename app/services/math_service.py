@@ -1,70 +1,411 @@
+import asyncio
 import json
-from typing import Callable, Any
+import math
+import sys
+from typing import Awaitable, Callable, Any, Dict, List, Tuple
 
-from app.utils.cache import get_cached_result, set_cached_result
+import numpy as np
+from prometheus_client import Counter
 
+from app.schemas.math_schemas import POW_BASE_LIMIT, POW_EXPONENT_LIMIT
+from app.services.compute_pool import run_in_pool
+from app.utils.cache import (
+    acquire_lock,
+    find_first_cached,
+    get_cached_result,
+    get_cached_results,
+    release_lock,
+    set_cached_result,
+    set_cached_results,
+)
+from app.utils.codec import decode_cost, decode_value, encode_value
+from app.utils.config import settings
 
-# Helper function that uses cache or computes and stores result
-def cache_or_compute(
+
+# Largest integer, in bits, rendered in decimal on the event loop. CPython
+# refuses int/str conversions past 4,300 digits by default, and the
+# conversion takes quadratic time, so longer results go to the pool.
+DECIMAL_INLINE_MAX_BITS = 14_000
+
+
+SINGLE_FLIGHT_COALESCED = Counter(
+    "math_singleflight_coalesced_total",
+    "Cache misses served by another request's computation",
+    ["scope"],
+)
+
+# Computations in progress in this process, by cache key
+_in_flight: Dict[str, "asyncio.Future[Any]"] = {}
+
+
+# Estimated cost of an operation, as the bit length of its result
+def estimate_cost(operation: str, input_data: dict) -> float:
+    if operation == "fibonacci":
+        return 0.7 * input_data["n"]
+    if operation == "factorial":
+        n = input_data["n"]
+        return n * math.log2(max(n, 2))
+    return 1
+
+
+# Run CPU-bound work inline when it is cheap, otherwise in the process
+# pool so a heavy request cannot hold the GIL for the whole worker
+async def run_cpu(func: Callable[..., Any], *args: Any, cost: float) -> Any:
+    if cost <= settings.COMPUTE_INLINE_MAX_COST:
+        return func(*args)
+    return await run_in_pool(func, *args)
+
+
+# Render an int in decimal with the int/str digit limit lifted for this
+# conversion only. It runs in a compute pool worker, so the limit of the
+# API process is left alone.
+def int_to_decimal(value: int) -> str:
+    limit = sys.get_int_max_str_digits()
+    sys.set_int_max_str_digits(0)
+    try:
+        return str(value)
+    finally:
+        sys.set_int_max_str_digits(limit)
+
+
+# Render a result as decimal text, converting large integers in the pool
+async def format_decimal(value: Any) -> str:
+    if isinstance(value, int) and \
+            value.bit_length() > DECIMAL_INLINE_MAX_BITS:
+        return await run_in_pool(int_to_decimal, value)
+    return str(value)
+
+
+# Decode a cached value, falling back to the raw value
+def decode_cached(key: str, cached: Any) -> Any:
+    try:
+        return decode_value(cached)
+    except ValueError:
+        print(
+            f"[CACHE HIT - JSON ERROR] "
+            f"[Raw cached value used. "
+            f"Key: {key}"
+        )
+        return cached
+
+
+# Build the cache key for an operation and its inputs
+def build_cache_key(operation: str, input_data: dict) -> str:
+    return f"{operation}:{json.dumps(input_data, sort_keys=True)}"
+
+
+# Helper function that uses cache or computes and stores result.
+# Concurrent misses on one key in this process share a single computation,
+# which keeps running even if the request that started it goes away.
+async def cache_or_compute(
     operation: str,
     input_data: dict,
-    compute_func: Callable[[], Any],
-    ttl: int = 3600
+    compute_func: Callable[[], Awaitable[Any]],
+    ttl: int = 3600,
+    cost: float = 0
 ) -> Any:
-    cache_key = f"{operation}:{json.dumps(input_data, sort_keys=True)}"
-    cached = get_cached_result(cache_key)
+    cache_key = build_cache_key(operation, input_data)
+    cached = await get_cached_result(cache_key)
     if cached is not None:
-        try:
-            print(f"[CACHE HIT] Key: {cache_key}")
-            return json.loads(cached)
-        except json.JSONDecodeError:
-            print(
-                f"[CACHE HIT - JSON ERROR] "
-                f"[Raw cached value used. "
-                f"Key: {cache_key}"
-            )
+        print(f"[CACHE HIT] Key: {cache_key}")
+        return await run_cpu(
+            decode_cached, cache_key, cached, cost=decode_cost(cached)
+        )
+
+    flight = _in_flight.get(cache_key)
+    if flight is None:
+        flight = asyncio.ensure_future(
+            fill_cache(cache_key, compute_func, ttl, cost)
+        )
+        _in_flight[cache_key] = flight
+        flight.add_done_callback(lambda _: _in_flight.pop(cache_key, None))
+    else:
+        SINGLE_FLIGHT_COALESCED.labels(scope="process").inc()
+    return await asyncio.shield(flight)
+
+
+# Compute and cache a missing value. For expensive values a short-lived
+# Redis lock lets one instance compute while the others wait for the
+# value; a waiter that times out computes the value itself.
+async def fill_cache(
+    cache_key: str,
+    compute_func: Callable[[], Awaitable[Any]],
+    ttl: int,
+    cost: float
+) -> Any:
+    token = None
+    if cost > settings.SINGLE_FLIGHT_MIN_COST:
+        token = await acquire_lock(
+            cache_key, settings.SINGLE_FLIGHT_LOCK_TTL_SECONDS
+        )
+        if token is None:
+            cached = await wait_for_cached_result(cache_key)
+            if cached is not None:
+                SINGLE_FLIGHT_COALESCED.labels(scope="cluster").inc()
+                return await run_cpu(
+                    decode_cached, cache_key, cached, cost=decode_cost(cached)
+                )
+
+    try:
+        result = await compute_func()
+        await set_cached_result(cache_key, encode_value(result), ttl=ttl)
+        return result
+    finally:
+        if token is not None:
+            await release_lock(cache_key, token)
+
+
+# Poll the cache until the key appears or the wait times out
+async def wait_for_cached_result(cache_key: str) -> Any:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.SINGLE_FLIGHT_WAIT_SECONDS
+    while loop.time() < deadline:
+        await asyncio.sleep(settings.SINGLE_FLIGHT_POLL_SECONDS)
+        cached = await get_cached_result(cache_key)
+        if cached is not None:
             return cached
+    return None
+
+
+# Build the cache key of the checkpoint for an operation at k
+def checkpoint_key(operation: str, k: int) -> str:
+    return build_cache_key(f"{operation}_checkpoint", {"k": k})
+
+
+# Load the highest stored value among (index, cache key) candidates, given
+# highest index first. Presence is checked in one round trip, so only the
+# chosen value is transferred. Returns (index, value), or (0, None) when
+# nothing usable is stored.
+async def load_nearest(candidates: List[Tuple[int, str]]) -> Tuple[int, Any]:
+    i = await find_first_cached([key for _, key in candidates])
+    if i is None:
+        return 0, None
+    index, key = candidates[i]
+    cached = await get_cached_result(key)
+    if cached is None:
+        return 0, None
+    try:
+        value = await run_cpu(decode_value, cached, cost=decode_cost(cached))
+    except ValueError:
+        return 0, None
+    return index, value
+
 
-    result = compute_func()
-    set_cached_result(cache_key, json.dumps(result), ttl=ttl)
-    return result
+# Checkpoints of an operation at k and every lower interval, highest first
+def lower_checkpoints(operation: str, k: int) -> List[Tuple[int, str]]:
+    return [
+        (j, checkpoint_key(operation, j))
+        for j in range(k, 0, -settings.CHECKPOINT_INTERVAL)
+    ]
+
+
+# Store the checkpoint for an operation at k
+async def store_checkpoint(operation: str, k: int, value: Any):
+    await set_cached_result(
+        checkpoint_key(operation, k),
+        encode_value(value),
+        ttl=settings.CHECKPOINT_TTL,
+    )
+
+
+# Return the checkpoint index at or below n (0 means no checkpoint)
+def checkpoint_floor(n: int) -> int:
+    interval = settings.CHECKPOINT_INTERVAL
+    return n // interval * interval if interval > 0 else 0
+
+
+# Return the pair (F(n), F(n + 1)) using fast doubling:
+# F(2k) = F(k) * (2 * F(k + 1) - F(k)), F(2k + 1) = F(k)^2 + F(k + 1)^2
+def fibonacci_pair(n: int) -> Tuple[int, int]:
+    a, b = 0, 1
+    for bit in bin(n)[2:]:
+        c = a * (2 * b - a)
+        d = a * a + b * b
+        if bit == "1":
+            a, b = d, c + d
+        else:
+            a, b = c, d
+    return a, b
+
+
+# Advance the pair (F(k), F(k + 1)) by m steps to (F(k + m), F(k + m + 1))
+def fibonacci_advance(pair: Tuple[int, int], m: int) -> Tuple[int, int]:
+    fk, fk1 = pair
+    fm, fm1 = fibonacci_pair(m)
+    return fk1 * fm + fk * (fm1 - fm), fk1 * fm1 + fk * fm
+
+
+# Compute F(n), resuming from the nearest stored checkpoint
+# (F(j), F(j + 1)) at or below n; the checkpoint at n's own interval is
+# stored when it was missing
+async def compute_fibonacci(n: int) -> int:
+    cost = estimate_cost("fibonacci", {"n": n})
+    k = checkpoint_floor(n)
+    if k == 0:
+        return (await run_cpu(fibonacci_pair, n, cost=cost))[0]
+    j, pair = await load_nearest(lower_checkpoints("fibonacci", k))
+    if pair is None:
+        pair = await run_cpu(fibonacci_pair, k, cost=cost)
+    elif j < k:
+        pair = await run_cpu(fibonacci_advance, tuple(pair), k - j, cost=cost)
+    if j < k:
+        await store_checkpoint("fibonacci", k, list(pair))
+    return (
+        await run_cpu(fibonacci_advance, tuple(pair), n - k, cost=cost)
+    )[0]
 
 
 # Fibonacci number computation with caching
-def calculate_fibonacci(n: int) -> int:
+async def calculate_fibonacci(n: int) -> int:
     if n < 0:
         raise ValueError("Input must be a non-negative integer.")
 
-    def compute():
-        a, b = 0, 1
-        for _ in range(n):
-            a, b = b, a + b
-        return a
+    return await cache_or_compute(
+        "fibonacci",
+        {"n": n},
+        lambda: compute_fibonacci(n),
+        cost=estimate_cost("fibonacci", {"n": n})
+        )
+
+
+# Product of all integers in [lo, hi] using a balanced product tree,
+# so big-int multiplications happen between operands of similar size
+def range_product(lo: int, hi: int) -> int:
+    if hi < lo:
+        return 1
+    if hi - lo < 16:
+        return math.prod(range(lo, hi + 1))
+    mid = (lo + hi) // 2
+    return range_product(lo, mid) * range_product(mid + 1, hi)
+
 
-    return cache_or_compute("fibonacci", {"n": n}, compute)
+# Multiply a partial product by every integer in [lo, hi]
+def extend_product(partial: int, lo: int, hi: int) -> int:
+    return partial * range_product(lo, hi)
+
+
+# Compute n!, resuming from the nearest stored j! below n: a cached
+# factorial result above n's checkpoint, or else the highest stored
+# checkpoint. The checkpoint at n's own interval is stored when missing.
+async def compute_factorial(n: int) -> int:
+    cost = estimate_cost("factorial", {"n": n})
+    k = checkpoint_floor(n)
+    if k == 0:
+        return await run_cpu(range_product, 2, n, cost=cost)
+    results = [
+        (j, build_cache_key("factorial", {"n": j}))
+        for j in range(n - 1, k, -1)
+    ]
+    j, partial = await load_nearest(
+        results + lower_checkpoints("factorial", k)
+    )
+    if partial is None:
+        j, partial = 1, 1
+    if j < k:
+        partial = await run_cpu(extend_product, partial, j + 1, k, cost=cost)
+        await store_checkpoint("factorial", k, partial)
+        j = k
+    return await run_cpu(extend_product, partial, j + 1, n, cost=cost)
 
 
 # Factorial computation with caching
-def calculate_factorial(n: int) -> int:
+async def calculate_factorial(n: int) -> int:
     if n < 0:
         raise ValueError("Input must be a non-negative integer.")
 
-    def compute():
-        result = 1
-        for i in range(2, n + 1):
-            result *= i
-        return result
+    return await cache_or_compute(
+        "factorial",
+        {"n": n},
+        lambda: compute_factorial(n),
+        cost=estimate_cost("factorial", {"n": n})
+        )
 
-    return cache_or_compute("factorial", {"n": n}, compute)
 
+# Compute base ^ exponent (a single float operation, so it stays inline)
+async def compute_power(base: float, exponent: float) -> float:
+    return base ** exponent
 
-# Power computation with caching
-def calculate_power(base: float, exponent: float) -> float:
-    def compute():
-        return base ** exponent
 
-    return cache_or_compute(
+# Power computation with caching
+async def calculate_power(base: float, exponent: float) -> float:
+    return await cache_or_compute(
         "power",
         {"base": base, "exponent": exponent},
-        compute
+        lambda: compute_power(base, exponent)
+        )
+
+
+# Vectorized power over arrays, with the same ranges as PowRequest and
+# the same failure cases as the scalar operator (overflow, 0 to a negative
+# power, negative base to a fractional power)
+def calculate_power_array(
+    bases: np.ndarray,
+    exponents: np.ndarray
+) -> np.ndarray:
+    bases = np.asarray(bases, dtype=np.float64)
+    exponents = np.asarray(exponents, dtype=np.float64)
+    if bases.ndim != 1 or bases.shape != exponents.shape:
+        raise ValueError("Bases and exponents must be arrays of equal length.")
+    if not np.all(np.abs(bases) <= POW_BASE_LIMIT):
+        raise ValueError("Base must be between -1e6 and 1e6")
+    if not np.all(np.abs(exponents) <= POW_EXPONENT_LIMIT):
+        raise ValueError("Exponent must be between -1000 and 1000")
+
+    with np.errstate(all="ignore"):
+        results = np.power(bases, exponents)
+
+    invalid = np.flatnonzero(~np.isfinite(results))
+    if invalid.size:
+        i = int(invalid[0])
+        raise ValueError(
+            f"Result out of range at index {i}: "
+            f"{bases[i]!r} ** {exponents[i]!r}"
+        )
+    return results
+
+
+# Compute functions by operation name, called with the operation inputs
+COMPUTATIONS: Dict[str, Callable[..., Awaitable[Any]]] = {
+    "fibonacci": compute_fibonacci,
+    "factorial": compute_factorial,
+    "power": compute_power,
+}
+
+
+# Evaluate many (operation, input_data) pairs with one cache round trip
+# for all lookups and one for all write-backs; duplicates are computed once
+async def calculate_batch(
+    operations: List[Tuple[str, dict]],
+    ttl: int = 3600
+) -> List[Any]:
+    keys = [build_cache_key(op, data) for op, data in operations]
+    inputs = dict(zip(keys, operations))
+    unique_keys = list(inputs)
+
+    results: Dict[str, Any] = {}
+    missing: List[str] = []
+    cached_values = await get_cached_results(unique_keys)
+    for key, cached in zip(unique_keys, cached_values):
+        if cached is None:
+            missing.append(key)
+        else:
+            results[key] = await run_cpu(
+                decode_cached, key, cached, cost=decode_cost(cached)
+            )
+
+    # Compute the misses with bounded concurrency, so a large batch stays
+    # within the compute pool's pending limit, and write them back together
+    slots = asyncio.Semaphore(settings.BATCH_COMPUTE_CONCURRENCY)
+
+    async def compute(key: str) -> Any:
+        operation, input_data = inputs[key]
+        async with slots:
+            return await COMPUTATIONS[operation](**input_data)
+
+    computed = await asyncio.gather(*(compute(key) for key in missing))
+    results.update(zip(missing, computed))
+    if missing:
+        await set_cached_results(
+            {key: encode_value(results[key]) for key in missing}, ttl=ttl
         )
+    return [results[key] for key in keys]
@@ -1,21 +1,213 @@
-import redis
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis.asyncio as redis
+from prometheus_client import Counter, Gauge
 
 from app.utils.config import settings
 
 
-# Initialize Redis client connection
+# Initialize Redis client connection (binary-safe: values are raw bytes)
 r = redis.Redis(
     host=settings.REDIS_HOST,
     port=settings.REDIS_PORT,
-    decode_responses=True
+    decode_responses=False
 )
 
 
-# Retrieve a cached value by key
-def get_cached_result(key: str):
-    return r.get(key)
+# Metrics for the in-process (L1) cache tier
+L1_HITS = Counter("math_cache_l1_hits_total", "L1 cache hits")
+L1_MISSES = Counter("math_cache_l1_misses_total", "L1 cache misses")
+L1_EVICTIONS = Counter(
+    "math_cache_l1_evictions_total",
+    "L1 cache entries evicted to respect the size limits"
+)
+
+# Metrics for the in-process caches used by authentication
+AUTH_CACHE_HITS = Counter(
+    "math_auth_cache_hits_total", "Auth cache hits", ["cache"]
+)
+AUTH_CACHE_MISSES = Counter(
+    "math_auth_cache_misses_total", "Auth cache misses", ["cache"]
+)
+AUTH_CACHE_EVICTIONS = Counter(
+    "math_auth_cache_evictions_total", "Auth cache entries evicted", ["cache"]
+)
+
+
+# Bounded in-process LRU cache with per-entry expiry; only str and bytes
+# values count towards max_bytes
+class LocalCache:
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        hits: Counter = L1_HITS,
+        misses: Counter = L1_MISSES,
+        evictions: Counter = L1_EVICTIONS,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._hits = hits
+        self._misses = misses
+        self._evictions = evictions
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # Return the value for key, or None if it is missing or expired
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses.inc()
+                return None
+            value, _, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self._misses.inc()
+                return None
+            self._entries.move_to_end(key)
+            self._hits.inc()
+            return value
+
+    # Store a value that expires after ttl seconds
+    def set(self, key: str, value: Any, ttl: float):
+        size = len(value) if isinstance(value, (str, bytes)) else 0
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if ttl <= 0 or size > self.max_bytes or self.max_entries <= 0:
+                return
+            self._entries[key] = (value, size, time.monotonic() + ttl)
+            self.total_bytes += size
+            while (
+                len(self._entries) > self.max_entries
+                or self.total_bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self._evictions.inc()
+
+    # Drop one entry if present
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    # Drop every entry
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self.total_bytes -= size
+
+
+# In-process tier that sits in front of Redis
+local_cache = LocalCache(
+    max_entries=settings.CACHE_L1_MAX_ENTRIES,
+    max_bytes=settings.CACHE_L1_MAX_BYTES,
+)
+
+Gauge(
+    "math_cache_l1_entries", "Entries held in the L1 cache"
+).set_function(lambda: len(local_cache))
+Gauge(
+    "math_cache_l1_bytes", "Payload bytes held in the L1 cache"
+).set_function(lambda: local_cache.total_bytes)
+
+
+# Retrieve a cached value by key, trying the local tier before Redis
+async def get_cached_result(key: str):
+    value = local_cache.get(key)
+    if value is not None:
+        return value
+
+    # Fetch the value with its remaining TTL in a single round trip
+    pipe = r.pipeline(transaction=False)
+    pipe.get(key)
+    pipe.ttl(key)
+    value, ttl = await pipe.execute()
+    if value is not None and ttl > 0:
+        local_cache.set(key, value, ttl)
+    return value
+
+
+# Retrieve many cached values, resolving local misses in one pipeline
+async def get_cached_results(keys: List[str]) -> List[Optional[Any]]:
+    values = [local_cache.get(key) for key in keys]
+    missing = [i for i, value in enumerate(values) if value is None]
+    if not missing:
+        return values
+
+    pipe = r.pipeline(transaction=False)
+    for i in missing:
+        pipe.get(keys[i])
+        pipe.ttl(keys[i])
+    replies = await pipe.execute()
+    for i, value, ttl in zip(missing, replies[::2], replies[1::2]):
+        values[i] = value
+        if value is not None and ttl > 0:
+            local_cache.set(keys[i], value, ttl)
+    return values
+
+
+# Return the index of the first of keys present in Redis, or None. Only
+# presence is checked, in one pipeline, so no values are transferred.
+async def find_first_cached(keys: List[str]) -> Optional[int]:
+    if not keys:
+        return None
+    pipe = r.pipeline(transaction=False)
+    for key in keys:
+        pipe.exists(key)
+    found = await pipe.execute()
+    return next((i for i, exists in enumerate(found) if exists), None)
 
 
 # Store a value in cache with TTL (in seconds)
-def set_cached_result(key: str, value: str, ttl: int = 3600):
-    r.set(key, value, ex=ttl)
+async def set_cached_result(key: str, value: bytes, ttl: int = 3600):
+    await r.set(key, value, ex=ttl)
+    local_cache.set(key, value, ttl)
+
+
+# Store many values with the same TTL in one pipeline
+async def set_cached_results(values: Dict[str, bytes], ttl: int = 3600):
+    pipe = r.pipeline(transaction=False)
+    for key, value in values.items():
+        pipe.set(key, value, ex=ttl)
+    await pipe.execute()
+    for key, value in values.items():
+        local_cache.set(key, value, ttl)
+
+
+# Compare-and-delete, so a lock is only released by its holder
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+# Try to take a short-lived lock for key; return its token or None
+async def acquire_lock(key: str, ttl: float) -> Optional[str]:
+    token = uuid.uuid4().hex
+    if await r.set(f"lock:{key}", token, nx=True, px=int(ttl * 1000)):
+        return token
+    return None
+
+
+# Release a lock taken with acquire_lock
+async def release_lock(key: str, token: str):
+    await r.eval(_RELEASE_LOCK_SCRIPT, 1, f"lock:{key}", token)
@@ -0,0 +1,88 @@
+import json
+import struct
+import zlib
+from typing import Any, Union
+
+from app.utils.config import settings
+
+
+# Binary cache values start with this version byte; JSON text never does,
+# so entries written before the codec existed still decode until they expire
+CODEC_VERSION = b"\x01"
+
+_INT = b"i"
+_ZLIB_INT = b"z"
+_FLOAT = b"f"
+_LIST = b"l"
+_JSON = b"j"
+
+_LENGTH = struct.Struct(">I")
+_DOUBLE = struct.Struct(">d")
+
+
+# Encode an int as signed big-endian bytes, compressed when it pays off
+def _encode_int(value: int) -> bytes:
+    payload = value.to_bytes(
+        (value.bit_length() + 8) // 8, "big", signed=True
+    )
+    if settings.CACHE_COMPRESS_MIN_BYTES <= len(payload):
+        compressed = zlib.compress(payload, settings.CACHE_COMPRESS_LEVEL)
+        if len(compressed) < len(payload):
+            return _ZLIB_INT + compressed
+    return _INT + payload
+
+
+# Encode a value without the version byte
+def _encode(value: Any) -> bytes:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return _encode_int(value)
+    if isinstance(value, float):
+        return _FLOAT + _DOUBLE.pack(value)
+    if isinstance(value, (list, tuple)):
+        parts = [_encode(item) for item in value]
+        return _LIST + b"".join(
+            _LENGTH.pack(len(part)) + part for part in parts
+        )
+    return _JSON + json.dumps(value).encode()
+
+
+# Decode a value written by _encode
+def _decode(data: memoryview) -> Any:
+    kind, body = bytes(data[:1]), data[1:]
+    if kind == _INT:
+        return int.from_bytes(body, "big", signed=True)
+    if kind == _ZLIB_INT:
+        return int.from_bytes(zlib.decompress(body), "big", signed=True)
+    if kind == _FLOAT:
+        return _DOUBLE.unpack(body)[0]
+    if kind == _LIST:
+        items, offset = [], 0
+        while offset < len(body):
+            (size,) = _LENGTH.unpack_from(body, offset)
+            offset += _LENGTH.size
+            items.append(_decode(body[offset:offset + size]))
+            offset += size
+        return items
+    if kind == _JSON:
+        return json.loads(bytes(body))
+    raise ValueError(f"Unknown cache value type {kind!r}")
+
+
+# Encode a result for the cache
+def encode_value(value: Any) -> bytes:
+    return CODEC_VERSION + _encode(value)
+
+
+# Decode a cached value, accepting both binary and legacy JSON entries
+def decode_value(raw: Union[bytes, str]) -> Any:
+    if isinstance(raw, bytes) and raw[:1] == CODEC_VERSION:
+        return _decode(memoryview(raw)[1:])
+    return json.loads(raw)
+
+
+# Whether decoding is costly: binary entries decode in linear time, legacy
+# JSON integers need a quadratic decimal conversion
+def decode_cost(raw: Union[bytes, str]) -> float:
+    if isinstance(raw, bytes) and raw[:1] == CODEC_VERSION:
+        return 0
+    return 4 * len(raw)
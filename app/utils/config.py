@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import ConfigDict
 from pydantic_settings import BaseSettings
 
@@ -6,12 +8,80 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     app_name: str = "Math API"
     db_url: str = "sqlite:///data/math.db"
+    DB_ROLE: str = "api"
+    DB_POOL_SIZE: Optional[int] = None
+    DB_SQLITE_WAL: bool = True
+    DB_BUSY_TIMEOUT_MS: int = 5000
+    DB_MMAP_SIZE: int = 256 * 1024 * 1024
+    DB_CACHE_SIZE_KB: int = 64 * 1024
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = 5.0
+    AUTH_STATELESS: bool = False
+    AUTH_REVOCATION_SYNC_SECONDS: float = 30.0
+    AUTH_TOKEN_CACHE_SIZE: int = 10_000
+    AUTH_USER_CACHE_SIZE: int = 10_000
+    AUTH_USER_CACHE_TTL_SECONDS: float = 60.0
     REDIS_HOST: str = "redis"
     REDIS_PORT: int = 6379
+    CACHE_L1_MAX_ENTRIES: int = 1024
+    CACHE_L1_MAX_BYTES: int = 64 * 1024 * 1024
+    CACHE_COMPRESS_MIN_BYTES: int = 4096
+    CACHE_COMPRESS_LEVEL: int = 1
     API_BASE: str = "http://localhost:8000"
+    UI_DISPATCH: str = "inprocess"
+    UI_API_MAX_CONNECTIONS: int = 20
+    UI_API_TIMEOUT_SECONDS: float = 30.0
+    LOG_TRANSPORT: str = "pubsub"
+    LOG_STREAM_MAXLEN: int = 1_000_000
+    LOG_STREAM_GROUP: str = "log_workers"
+    LOG_STREAM_CLAIM_IDLE_MS: int = 60_000
+    LOG_STREAM_CLAIM_INTERVAL_SECONDS: float = 30.0
+    LOG_QUEUE_MAXSIZE: int = 10_000
+    LOG_QUEUE_OVERFLOW: str = "drop"
+    LOG_SPOOL_PATH: str = "data/log_spool.ndjson"
+    LOG_SPOOL_FSYNC_BATCH: int = 100
+    LOG_SPOOL_FSYNC_INTERVAL_SECONDS: float = 1.0
+    LOG_SPOOL_REPLAY_INTERVAL_SECONDS: float = 5.0
+    LOG_BREAKER_FAILURE_THRESHOLD: int = 3
+    LOG_BREAKER_RESET_SECONDS: float = 5.0
+    LOG_REDIS_TIMEOUT_SECONDS: float = 1.0
+    LOG_PUBLISH_BATCH_SIZE: int = 200
+    LOG_RESULT_MAX_BITS: int = 10_000
+    LOG_BATCH_SIZE: int = 500
+    LOG_FLUSH_INTERVAL_SECONDS: float = 1.0
+    LOG_BUFFER_MAX_ROWS: int = 50_000
+    LOG_DEAD_LETTER_PATH: str = "data/log_dead_letter.ndjson"
+    LOG_RETENTION_DAYS: int = 30
+    LOG_RETENTION_CHUNK_SIZE: int = 1000
+    LOG_RETENTION_MAX_CHUNKS: int = 5
+    LOG_RETENTION_INTERVAL_SECONDS: float = 3600.0
+    LOG_ARCHIVE_DIR: str = "data/archive"
+    FIBONACCI_MAX_N: int = 2_000_000
+    FACTORIAL_MAX_N: int = 100_000
+    CHECKPOINT_INTERVAL: int = 256
+    CHECKPOINT_TTL: int = 24 * 3600
+    BATCH_MAX_OPERATIONS: int = 1000
+    BATCH_COMPUTE_CONCURRENCY: int = 8
+    COMPUTE_INLINE_MAX_COST: float = 100_000
+    COMPUTE_POOL_WORKERS: Optional[int] = None
+    COMPUTE_POOL_MAX_PENDING: int = 32
+    COMPUTE_DEADLINE_SECONDS: float = 10.0
+    SINGLE_FLIGHT_MIN_COST: float = 100_000
+    SINGLE_FLIGHT_LOCK_TTL_SECONDS: float = 30.0
+    SINGLE_FLIGHT_WAIT_SECONDS: float = 10.0
+    SINGLE_FLIGHT_POLL_SECONDS: float = 0.05
+    POW_ARRAY_MAX_LENGTH: int = 1_000_000
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_BUCKET_CAPACITY: float = 5_000_000
+    ADMISSION_REFILL_PER_SECOND: float = 500_000
+    ADMISSION_BASE_COST: float = 1
+    ADMISSION_MAX_CONCURRENT: int = 16
+    ADMISSION_SLOT_LEASE_SECONDS: float = 30.0
 
     # Load environment variables from .env file
     model_config = ConfigDict(env_file=".env")
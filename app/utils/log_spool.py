@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Iterator, List, Optional, TextIO, Tuple
+
+from app.utils.config import settings
+
+
+# Durable append-only NDJSON file of (channel, message) records that could
+# not be published. Writes reach the OS at once and are fsynced in batches,
+# every LOG_SPOOL_FSYNC_BATCH records or LOG_SPOOL_FSYNC_INTERVAL_SECONDS.
+# For replay the file is moved aside, so new records keep appending to a
+# fresh spool while the old ones are drained.
+class LogSpool:
+
+    def __init__(self, path: str):
+        self.path = path
+        self.replay_path = path + ".replay"
+        self.lock = threading.Lock()
+        self.file: Optional[TextIO] = None
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def append(self, batch: List[Tuple[str, Any]]):
+        lines = "".join(
+            json.dumps({"channel": channel, "message": message}, default=str)
+            + "\n"
+            for channel, message in batch
+        )
+        with self.lock:
+            if self.file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self.file = open(self.path, "a")
+            self.file.write(lines)
+            self.file.flush()
+            self.unsynced += len(batch)
+            if self.unsynced >= settings.LOG_SPOOL_FSYNC_BATCH or \
+                    time.monotonic() - self.last_sync \
+                    >= settings.LOG_SPOOL_FSYNC_INTERVAL_SECONDS:
+                self._sync()
+
+    def _sync(self):
+        if self.file is not None and self.unsynced:
+            os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    # Fsync records appended since the last sync
+    def sync(self):
+        with self.lock:
+            self._sync()
+
+    def close(self):
+        with self.lock:
+            self._sync()
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    # Whether records are waiting to be replayed
+    def pending(self) -> bool:
+        if os.path.exists(self.replay_path):
+            return True
+        return os.path.exists(self.path) and os.path.getsize(self.path) > 0
+
+    # Move the spool aside for replay; a replay file left by an interrupted
+    # replay is drained first. Returns False when there is nothing to replay.
+    def start_replay(self) -> bool:
+        with self.lock:
+            if os.path.exists(self.replay_path):
+                return True
+            if not os.path.exists(self.path) or \
+                    os.path.getsize(self.path) == 0:
+                return False
+            self._sync()
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            os.replace(self.path, self.replay_path)
+            return True
+
+    # Yield (end offset, batch) pairs from the replay file. Lines torn by a
+    # crash mid-write are skipped.
+    def read_replay(
+        self, batch_size: int
+    ) -> Iterator[Tuple[int, List[Tuple[str, Any]]]]:
+        offset, batch = 0, []
+        with open(self.replay_path, "rb") as f:
+            for line in f:
+                offset += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                batch.append((record["channel"], record["message"]))
+                if len(batch) >= batch_size:
+                    yield offset, batch
+                    batch = []
+        if batch:
+            yield offset, batch
+
+    # Drop the replay file up to offset, keeping the rest for the next try
+    def finish_replay(self, offset: int):
+        if offset >= os.path.getsize(self.replay_path):
+            os.remove(self.replay_path)
+            return
+        if offset == 0:
+            return
+        tmp_path = self.replay_path + ".tmp"
+        with open(self.replay_path, "rb") as src, open(tmp_path, "wb") as dst:
+            src.seek(offset)
+            while chunk := src.read(1 << 20):
+                dst.write(chunk)
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(tmp_path, self.replay_path)
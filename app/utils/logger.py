@@ -1,36 +1,265 @@
-import redis
+import asyncio
+import math
+import time
+import redis.asyncio as redis
 import json
-from typing import Dict, Any
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
 
 from app.utils.config import settings
+from app.utils.log_spool import LogSpool
 
 
-# Initialize Redis client connection
+# Initialize Redis client connection; short timeouts keep a dead Redis
+# from stalling the publisher
 r = redis.Redis(
     host=settings.REDIS_HOST,
     port=settings.REDIS_PORT,
-    decode_responses=True
+    decode_responses=True,
+    socket_connect_timeout=settings.LOG_REDIS_TIMEOUT_SECONDS,
+    socket_timeout=settings.LOG_REDIS_TIMEOUT_SECONDS,
+)
+
+
+LOGS_DROPPED = Counter(
+    "math_logs_dropped_total", "Log messages dropped on queue overflow"
+)
+LOGS_SPILLED = Counter(
+    "math_logs_spilled_total", "Log messages spilled to disk on overflow"
+)
+LOGS_SPOOLED = Counter(
+    "math_logs_spooled_total", "Log messages spooled while Redis failed"
 )
+LOGS_REPLAYED = Counter(
+    "math_logs_replayed_total", "Spooled log messages replayed into Redis"
+)
+
+
+# Circuit breaker for Redis: after LOG_BREAKER_FAILURE_THRESHOLD failures in
+# a row it opens and publishes go straight to the spool; after
+# LOG_BREAKER_RESET_SECONDS one trial publish is let through, and its
+# outcome closes or re-opens the breaker.
+class CircuitBreaker:
+
+    def __init__(self):
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at >= settings.LOG_BREAKER_RESET_SECONDS:
+            # Half-open: further calls wait for this trial's outcome
+            self.opened_at = now
+            return True
+        return False
 
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
 
-# Publish a structured log message to a Redis channel
-def publish_log(channel: str, message: dict):
-    print("publish log")
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= settings.LOG_BREAKER_FAILURE_THRESHOLD:
+            self.opened_at = time.monotonic()
+
+
+breaker = CircuitBreaker()
+spool = LogSpool(settings.LOG_SPOOL_PATH)
+
+Gauge(
+    "math_log_breaker_open", "Whether the Redis log circuit breaker is open"
+).set_function(lambda: int(breaker.is_open))
+
+
+# Publish a batch of (channel, message) pairs over one Redis pipeline, to
+# the channel itself or to its stream when LOG_TRANSPORT is "streams"
+async def execute_batch(batch: List[Tuple[str, dict]]):
+    pipe = r.pipeline(transaction=False)
+    for channel, message in batch:
+        payload = json.dumps(message, default=str)
+        if settings.LOG_TRANSPORT == "streams":
+            pipe.xadd(
+                f"{channel}:stream",
+                {"data": payload},
+                maxlen=settings.LOG_STREAM_MAXLEN,
+                approximate=True,
+            )
+        else:
+            pipe.publish(channel, payload)
+    await pipe.execute()
+
+
+# Publish a batch, or append it to the spool when Redis fails or the
+# breaker is open
+async def send_batch(batch: List[Tuple[str, dict]]):
+    if breaker.allow():
+        try:
+            await execute_batch(batch)
+            breaker.record_success()
+            return
+        except Exception:
+            breaker.record_failure()
+    await asyncio.to_thread(spool.append, batch)
+    LOGS_SPOOLED.inc(len(batch))
+
+
+# Drain the spool into Redis in batches; whatever is left after a failure
+# stays spooled for the next attempt. The file is read and parsed in a
+# worker thread, one batch at a time. Returns the number replayed.
+async def replay_spool() -> int:
+    if not spool.pending() or not breaker.allow():
+        return 0
+    if not await asyncio.to_thread(spool.start_replay):
+        return 0
+    offset = replayed = 0
+    batches = spool.read_replay(settings.LOG_PUBLISH_BATCH_SIZE)
     try:
-        if not isinstance(message, dict):
-            raise ValueError(
-                "Message must be a dictionary for JSON serialization."
-                )
-        if not isinstance(channel, str) or not channel:
-            raise ValueError("Channel must be a non-empty string.")
-        print("[PUBLISH_LOG]", json.dumps(message, default=str))
-        r.publish(channel, json.dumps(message))
+        while item := await asyncio.to_thread(next, batches, None):
+            end, batch = item
+            await execute_batch(batch)
+            breaker.record_success()
+            offset, replayed = end, replayed + len(batch)
     except Exception:
+        breaker.record_failure()
+    finally:
+        batches.close()
+        await asyncio.to_thread(spool.finish_replay, offset)
+    LOGS_REPLAYED.inc(replayed)
+    return replayed
+
+
+# Background publisher: requests enqueue messages and return at once, and a
+# single task sends whatever is queued in batches. LOG_QUEUE_OVERFLOW picks
+# what happens when the queue is full: "drop", "block" or "spill" to the
+# spool. A second task replays the spool every
+# LOG_SPOOL_REPLAY_INTERVAL_SECONDS once Redis is reachable again.
+class LogPublisher:
+
+    def __init__(self):
+        self.queue: Optional[asyncio.Queue] = None
+        self.task: Optional[asyncio.Task] = None
+        self.replay_task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def start(self):
+        self.queue = asyncio.Queue(maxsize=settings.LOG_QUEUE_MAXSIZE)
+        self.task = asyncio.create_task(self._run())
+        self.replay_task = asyncio.create_task(self._replay())
+
+    # Send everything still queued, then stop the background task
+    async def stop(self, timeout: float = 5.0):
+        if not self.running:
+            return
         try:
-            with open("log_fallback.log", "a") as f:
-                f.write(f"[{channel}] {str(message)}\n")
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print("[LOG PUBLISHER] Timed out flushing queued logs")
+        self.task.cancel()
+        self.replay_task.cancel()
+        self.task = self.replay_task = None
+        await asyncio.to_thread(spool.close)
+
+    async def publish(self, channel: str, message: dict):
+        if not self.running:
+            await send_batch([(channel, message)])
+            return
+        try:
+            self.queue.put_nowait((channel, message))
+        except asyncio.QueueFull:
+            policy = settings.LOG_QUEUE_OVERFLOW
+            if policy == "block":
+                await self.queue.put((channel, message))
+            elif policy == "spill":
+                await self._spill(channel, message)
+            else:
+                LOGS_DROPPED.inc()
+
+    async def _spill(self, channel: str, message: dict):
+        try:
+            await asyncio.to_thread(spool.append, [(channel, message)])
+            LOGS_SPILLED.inc()
         except Exception as file_error:
-            print(f"[FATAL] Even fallback file logging failed: {file_error}")
+            LOGS_DROPPED.inc()
+            print(f"[FATAL] Spilling log to disk failed: {file_error}")
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < settings.LOG_PUBLISH_BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                await send_batch(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _replay(self):
+        while True:
+            await asyncio.sleep(settings.LOG_SPOOL_REPLAY_INTERVAL_SECONDS)
+            try:
+                await asyncio.to_thread(spool.sync)
+                replayed = await replay_spool()
+                if replayed:
+                    print(f"[LOG PUBLISHER] Replayed {replayed} spooled logs")
+            except Exception as e:
+                print(f"[LOG PUBLISHER] Spool replay failed: {e}")
+
+
+publisher = LogPublisher()
+
+Gauge(
+    "math_log_queue_depth", "Log messages waiting to be published"
+).set_function(lambda: publisher.queue.qsize() if publisher.queue else 0)
+
+
+# Start the background publisher on the running event loop
+def start_log_publisher():
+    publisher.start()
+
+
+# Flush queued logs and stop the background publisher
+async def stop_log_publisher():
+    await publisher.stop()
+
+
+# Queue a structured log message for publishing to a Redis channel. The
+# message is stamped with its creation time, so logs replayed from the
+# spool keep their original timestamp.
+async def publish_log(channel: str, message: dict):
+    if not isinstance(message, dict) or not isinstance(channel, str) \
+            or not channel:
+        LOGS_DROPPED.inc()
+        print(f"[LOG PUBLISHER] Dropped malformed log for {channel!r}")
+        return
+    if "timestamp" not in message:
+        message = {
+            **message, "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+    await publisher.publish(channel, message)
+
+
+# Render a result for the log; huge integers are summarised, since their
+# decimal conversion is quadratic and would stall the request
+def format_log_result(result: Any) -> str:
+    if isinstance(result, int) and \
+            result.bit_length() > settings.LOG_RESULT_MAX_BITS:
+        digits = int(result.bit_length() * math.log10(2)) + 1
+        return f"<integer with about {digits:,} digits>"
+    return str(result)
 
 
 # Build a dictionary representing a log message
@@ -48,5 +277,5 @@ def build_log_message(
         "user": user,
         "operation": operation,
         "input": input_data,
-        "result": str(result)
+        "result": format_log_result(result)
     }
@@ -2,11 +2,11 @@ from app.views.contexts.base import BasePageContext
 from typing import Optional
 
 
-# Context object for the math operations page
+# Context object for the math operations page; results are decimal text
 class MathPageContext(BasePageContext):
-    fibonacci_result: Optional[int] = None
-    power_result: Optional[float] = None
-    factorial_result: Optional[int] = None
+    fibonacci_result: Optional[str] = None
+    power_result: Optional[str] = None
+    factorial_result: Optional[str] = None
 
     fibonacci_error: Optional[str] = None
     power_error: Optional[str] = None
@@ -0,0 +1,63 @@
+import argparse
+import time
+
+from app.services.math_service import fibonacci_pair
+
+
+# Previous O(n) engine, kept here as the comparison baseline
+def fibonacci_iterative(n: int) -> int:
+    a, b = 0, 1
+    for _ in range(n):
+        a, b = b, a + b
+    return a
+
+
+# Fast-doubling engine used by the service
+def fibonacci_fast_doubling(n: int) -> int:
+    return fibonacci_pair(n)[0]
+
+
+# Return the best wall time (seconds) of several runs of func(n)
+def best_time(func, n: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(n)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the iterative and fast-doubling Fibonacci engines"
+    )
+    parser.add_argument(
+        "--n",
+        type=int,
+        nargs="+",
+        default=[1_000, 10_000, 100_000, 1_000_000, 2_000_000],
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--iterative-max-n",
+        type=int,
+        default=1_000_000,
+        help="Skip the iterative engine above this n (it is O(n^2))",
+    )
+    args = parser.parse_args()
+
+    print(f"{'n':>12} {'iterative (s)':>15} {'fast doubling (s)':>18} "
+          f"{'speedup':>9}")
+    for n in args.n:
+        fast = best_time(fibonacci_fast_doubling, n, args.repeat)
+        if n <= args.iterative_max_n:
+            assert fibonacci_iterative(n) == fibonacci_fast_doubling(n)
+            slow = best_time(fibonacci_iterative, n, args.repeat)
+            print(f"{n:>12,} {slow:>15.6f} {fast:>18.6f} "
+                  f"{slow / fast:>8.1f}x")
+        else:
+            print(f"{n:>12,} {'skipped':>15} {fast:>18.6f} {'-':>9}")
+
+
+if __name__ == "__main__":
+    main()
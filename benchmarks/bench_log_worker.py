@@ -0,0 +1,203 @@
+import argparse
+import json
+import logging
+import os
+import queue
+import resource
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from unittest.mock import patch
+
+
+# In-process stand-in for the parts of the Redis client the log worker
+# uses: pub/sub channels and a stream read by a single consumer group
+class FakeRedis:
+
+    def __init__(self):
+        self.subscribers = defaultdict(list)
+        self.entries = []
+        self.cursor = 0
+        self.cond = threading.Condition()
+        self.closed = False
+
+    def publish(self, channel, payload):
+        for subscriber in self.subscribers[channel]:
+            subscriber.put(payload)
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+    def xadd(self, stream, fields, **kwargs):
+        with self.cond:
+            self.entries.append((f"{len(self.entries)}-0", fields))
+            self.cond.notify_all()
+
+    def xgroup_create(self, stream, group, id="0", mkstream=False):
+        pass
+
+    def xautoclaim(self, stream, group, consumer, min_idle_time, count):
+        return ["0-0", [], []]
+
+    def xreadgroup(self, group, consumer, streams, count, block=None):
+        stream = next(iter(streams))
+        with self.cond:
+            self.cond.wait_for(
+                lambda: self.cursor < len(self.entries) or self.closed,
+                timeout=(block or 0) / 1000,
+            )
+            if self.cursor >= len(self.entries):
+                if self.closed:
+                    raise KeyboardInterrupt
+                return []
+            batch = self.entries[self.cursor:self.cursor + count]
+            self.cursor += len(batch)
+        return [[stream, batch]]
+
+    def xack(self, stream, group, *ids):
+        pass
+
+    # Stop the worker once everything published has been read
+    def finish(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+
+class FakePubSub:
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.messages = queue.Queue()
+
+    def subscribe(self, channel):
+        self.redis.subscribers[channel].append(self.messages)
+
+    def get_message(self, ignore_subscribe_messages=True, timeout=0.0):
+        try:
+            data = self.messages.get(timeout=max(timeout, 0))
+        except queue.Empty:
+            if self.redis.closed:
+                raise KeyboardInterrupt
+            return None
+        return {"type": "message", "data": data}
+
+    def close(self):
+        pass
+
+
+# Publish count synthetic log messages at rate per second (0: unthrottled),
+# recording when each was sent
+def produce(redis, transport, count, rate, sent_at):
+    # Pub/sub drops messages sent before the worker subscribes
+    while transport == "pubsub" and not redis.subscribers["logs"]:
+        time.sleep(0.01)
+    start = time.perf_counter()
+    for seq in range(count):
+        if rate:
+            delay = start + seq / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        payload = json.dumps({
+            "event": "operation_completed",
+            "level": "INFO",
+            "user": f"user{seq % 10}",
+            "operation": ("fibonacci", "factorial", "power")[seq % 3],
+            "input": {"seq": seq},
+            "result": "55",
+        })
+        sent_at[seq] = time.perf_counter()
+        if transport == "streams":
+            redis.xadd("logs:stream", {"data": payload})
+        else:
+            redis.publish("logs", payload)
+    redis.finish()
+
+
+# Return the p-th percentile of sorted values
+def percentile(values, p):
+    return values[min(int(len(values) * p / 100), len(values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure log worker throughput and publish-to-commit "
+                    "latency against an in-process Redis and a temporary "
+                    "SQLite database"
+    )
+    parser.add_argument("--messages", type=int, default=50_000)
+    parser.add_argument(
+        "--rate", type=float, default=0,
+        help="Messages per second to publish (0: as fast as possible)",
+    )
+    parser.add_argument(
+        "--transport", choices=["pubsub", "streams"], default="pubsub"
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--flush-interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Settings are read on import, so configure them first
+        os.environ["DB_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ["DB_ROLE"] = "worker"
+        os.environ["LOG_ARCHIVE_DIR"] = os.path.join(tmp, "archive")
+        os.environ["LOG_TRANSPORT"] = args.transport
+        os.environ["LOG_BATCH_SIZE"] = str(args.batch_size)
+        os.environ["LOG_FLUSH_INTERVAL_SECONDS"] = str(args.flush_interval)
+        os.environ.setdefault("SECRET_KEY", "benchmark")
+
+        from log_worker import worker
+        logging.getLogger(worker.__name__).setLevel(logging.WARNING)
+
+        redis = FakeRedis()
+        sent_at, latencies = {}, []
+        commit_times = []
+        flush_logs = worker.flush_logs
+
+        def timed_flush(rows):
+            done = flush_logs(rows)
+            if done:
+                now = time.perf_counter()
+                commit_times.append(now)
+                latencies.extend(
+                    now - sent_at[json.loads(row["input"])["seq"]]
+                    for row in rows[:done]
+                )
+            return done
+
+        producer = threading.Thread(
+            target=produce,
+            args=(redis, args.transport, args.messages, args.rate, sent_at),
+        )
+        with patch.object(worker, "flush_logs", timed_flush):
+            producer.start()
+            worker.start_log_worker(redis)
+            producer.join()
+
+        elapsed = (
+            max(commit_times) - min(sent_at.values()) if commit_times else 0
+        )
+        latencies.sort()
+        peak_rss_mb = resource.getrusage(
+            resource.RUSAGE_SELF
+        ).ru_maxrss / 1024
+
+    print(f"transport:          {args.transport}")
+    print(f"messages committed: {len(latencies):,} of {args.messages:,}")
+    print(f"commits:            {len(commit_times):,}")
+    if latencies:
+        print(f"throughput:         {len(latencies) / elapsed:,.0f} msg/s")
+        print(f"latency mean:       "
+              f"{statistics.mean(latencies) * 1000:,.1f} ms")
+        for p in (50, 95, 99):
+            print(f"latency p{p}:        "
+                  f"{percentile(latencies, p) * 1000:,.1f} ms")
+        print(f"latency max:        {latencies[-1] * 1000:,.1f} ms")
+    print(f"peak RSS:           {peak_rss_mb:,.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base, create_db_engine
+from app.db.models.log_model import Log
+from app.db.repositories.log_repository import get_logs_page
+
+
+# Previous engine setup (rollback journal, default pool and pragmas), kept
+# here as the comparison baseline
+def baseline_engine(url: str):
+    return create_engine(url, connect_args={"check_same_thread": False})
+
+
+# Build a batch of log rows like the worker writes
+def make_rows(count: int):
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "event": "operation_completed",
+            "level": "INFO",
+            "timestamp": now,
+            "user": f"user{i % 10}",
+            "operation": ("fibonacci", "factorial", "power")[i % 3],
+            "input": '{"n": 10}',
+            "result": "55",
+        }
+        for i in range(count)
+    ]
+
+
+# Run one writer (the log worker) and several readers (API /logs pages)
+# against the engine for a fixed time; return (writes, reads, errors)
+def run_mixed(engine, seconds: float, readers: int, batch: int):
+    Base.metadata.create_all(engine, tables=[Log.__table__])
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.execute(insert(Log), make_rows(10_000))
+        db.commit()
+
+    stop = threading.Event()
+    counts = {"writes": 0, "reads": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def writer():
+        while not stop.is_set():
+            try:
+                with Session() as db:
+                    db.execute(insert(Log), make_rows(batch))
+                    db.commit()
+                bump("writes")
+            except OperationalError:
+                bump("errors")
+
+    def reader(index: int):
+        while not stop.is_set():
+            try:
+                with Session() as db:
+                    _, cursor = get_logs_page(db, user=f"user{index % 10}")
+                    get_logs_page(db, cursor=cursor)
+                bump("reads")
+            except OperationalError:
+                bump("errors")
+
+    threads = [threading.Thread(target=writer)] + [
+        threading.Thread(target=reader, args=(i,)) for i in range(readers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    return counts["writes"], counts["reads"], counts["errors"]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare mixed read/write throughput of the previous "
+                    "SQLite setup and the storage profile"
+    )
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=100)
+    args = parser.parse_args()
+
+    profiles = {
+        "baseline": baseline_engine,
+        "profile": create_db_engine,
+    }
+    print(f"{'profile':>10} {'writes/s':>10} {'rows/s':>10} "
+          f"{'reads/s':>10} {'errors':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, factory in profiles.items():
+            url = f"sqlite:///{os.path.join(tmp, name + '.db')}"
+            writes, reads, errors = run_mixed(
+                factory(url), args.seconds, args.readers, args.batch
+            )
+            print(f"{name:>10} {writes / args.seconds:>10.1f} "
+                  f"{writes * args.batch / args.seconds:>10.0f} "
+                  f"{reads / args.seconds:>10.1f} {errors:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,20 @@
 import json
 import logging
+import os
+import signal
+import socket
+import time
 from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
 
 import redis
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
 
 from app.db.models.log_model import Log
 from app.db.database import SessionLocal, init_db
+from app.db.repositories.rollup_repository import upsert_rollups
+from app.services.log_retention import archive_old_logs
 from app.utils.config import settings
 
 # Configure logging
@@ -17,20 +26,216 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# Turn a raw pub/sub payload into a row for the logs table, keeping the
+# time the message was published when it carries one
+def parse_log_message(raw: Any) -> Dict[str, Any]:
+    data = json.loads(raw)
+    timestamp = data.get("timestamp")
+    return {
+        "event": data.get("event"),
+        "level": data.get("level"),
+        "timestamp": (
+            datetime.fromisoformat(timestamp) if timestamp
+            else datetime.now(timezone.utc)
+        ),
+        "user": data.get("user"),
+        "operation": data.get("operation"),
+        "input": json.dumps(data.get("input", {})),
+        "result": data.get("result", "no result"),
+    }
+
+
+# Insert rows and update the rollups in a single transaction
+def write_logs(rows: List[Dict[str, Any]]):
+    with SessionLocal() as db:
+        db.execute(insert(Log), rows)
+        upsert_rollups(db, rows)
+        db.commit()
+
+
+# Append rows the database rejected to the dead-letter file
+def dead_letter(rows: List[Dict[str, Any]]):
+    path = settings.LOG_DEAD_LETTER_PATH
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a") as f:
+            for row in rows:
+                f.write(json.dumps(row, default=str) + "\n")
+    except OSError as e:
+        logger.error(f"[ERROR] Dropped {len(rows)} rejected logs: {e}")
+        return
+    logger.warning(f"[LOGS DEAD-LETTERED] {len(rows)} rows to {path}")
+
+
+# Write buffered rows and return how many of the leading rows are done,
+# written or dead-lettered. When the batch is rejected, its rows are
+# retried one by one and those that still fail are dead-lettered, so a bad
+# row cannot hold back the rest. Rows from the first one that hits an
+# unavailable database (OperationalError) on are left for a later retry.
+def flush_logs(rows: List[Dict[str, Any]]) -> int:
+    if not rows:
+        return 0
+    try:
+        write_logs(rows)
+    except OperationalError as e:
+        logger.error(f"[ERROR] Failed to save {len(rows)} logs: {e}")
+        return 0
+    except Exception as e:
+        logger.warning(
+            f"[WORKER] Batch of {len(rows)} logs rejected, "
+            f"retrying row by row: {e}"
+        )
+    else:
+        logger.info(f"[LOGS SAVED] {len(rows)} rows")
+        return len(rows)
+
+    rejected = []
+    for done, row in enumerate(rows):
+        try:
+            write_logs([row])
+        except OperationalError as e:
+            logger.error(
+                f"[ERROR] Failed to save {len(rows) - done} logs: {e}"
+            )
+            dead_letter(rejected)
+            return done
+        except Exception:
+            logger.exception("[ERROR] Log row rejected")
+            rejected.append(row)
+    dead_letter(rejected)
+    return len(rows)
+
+
+# Archive and delete up to LOG_RETENTION_MAX_CHUNKS chunks of logs past
+# their retention age; return True when the cap was hit and more may remain
+def run_retention() -> bool:
+    max_chunks = settings.LOG_RETENTION_MAX_CHUNKS
+    try:
+        with SessionLocal() as db:
+            moved = archive_old_logs(db, max_chunks=max_chunks)
+    except Exception as e:
+        logger.exception(f"[ERROR] Log retention failed: {e}")
+        return False
+
+    if moved:
+        logger.info(f"[LOGS ARCHIVED] {moved} rows")
+    return moved >= max_chunks * settings.LOG_RETENTION_CHUNK_SIZE
+
+
+# Fire-and-forget source reading the 'logs' pub/sub channel
+class PubSubSource:
+
+    durable = False
+
+    def __init__(self, r: redis.Redis, channel: str):
+        self.pubsub = r.pubsub()
+        self.pubsub.subscribe(channel)
+
+    # Return up to one (message id, payload) pair, waiting up to timeout
+    def read(self, timeout: float, count: int) -> List[Tuple[Any, Any]]:
+        message = self.pubsub.get_message(
+            ignore_subscribe_messages=True, timeout=timeout
+        )
+        if message is None or message.get("type") != "message":
+            return []
+        return [(None, message["data"])]
+
+    # Pub/sub has no acknowledgements
+    def ack(self, ids: List[Any]):
+        pass
+
+    def close(self):
+        self.pubsub.close()
+
+
+# Durable source reading a Redis stream through a consumer group, so
+# several workers split the load and nothing is lost while they are down
+class StreamSource:
+
+    durable = True
+
+    def __init__(self, r: redis.Redis, stream: str):
+        self.r = r
+        self.stream = stream
+        self.group = settings.LOG_STREAM_GROUP
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self.last_claim = 0.0
+        try:
+            r.xgroup_create(stream, self.group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    # Return up to count (entry id, payload) pairs, periodically
+    # reclaiming entries left pending by workers that stopped
+    def read(self, timeout: float, count: int) -> List[Tuple[Any, Any]]:
+        now = time.monotonic()
+        if now - self.last_claim >= settings.LOG_STREAM_CLAIM_INTERVAL_SECONDS:
+            self.last_claim = now
+            claimed = self.r.xautoclaim(
+                self.stream,
+                self.group,
+                self.consumer,
+                min_idle_time=settings.LOG_STREAM_CLAIM_IDLE_MS,
+                count=count,
+            )[1]
+            entries = [(i, fields["data"]) for i, fields in claimed if fields]
+            if entries:
+                logger.info(f"[WORKER] Reclaimed {len(entries)} entries")
+                return entries
+
+        block_ms = int(timeout * 1000)
+        reply = self.r.xreadgroup(
+            self.group,
+            self.consumer,
+            {self.stream: ">"},
+            count=count,
+            block=block_ms or None,
+        )
+        return [
+            (entry_id, fields["data"])
+            for _, entries in reply or []
+            for entry_id, fields in entries
+        ]
+
+    # Acknowledge entries once their rows are committed
+    def ack(self, ids: List[Any]):
+        if ids:
+            self.r.xack(self.stream, self.group, *ids)
+
+    def close(self):
+        pass
+
+
+# Turn SIGTERM into SystemExit so buffered rows are flushed on shutdown
+def _raise_system_exit(signum, frame):
+    raise SystemExit(0)
+
+
 # Start the log worker that listens to Redis and saves logs to the DB.
-def start_log_worker():
+# Messages are buffered and written in one transaction when either
+# LOG_BATCH_SIZE rows are waiting or LOG_FLUSH_INTERVAL_SECONDS passed;
+# with the streams transport, entries are acknowledged after the commit.
+# While the database is down at most LOG_BUFFER_MAX_ROWS rows are held:
+# stream reads pause, and pub/sub messages beyond the cap are dropped.
+# Every LOG_RETENTION_INTERVAL_SECONDS old logs are moved to the archives,
+# a capped number of chunks per pass; a larger backlog is worked off one
+# pass per loop iteration, between reads, so ingestion keeps going.
+def start_log_worker(client: Optional[redis.Redis] = None):
 
     logger.info(">>>>>>>> STARTING LOG WORKER <<<<<<<<<<")
 
     # Connect to Redis
     try:
-        r = redis.Redis(
+        r = client or redis.Redis(
             host=settings.REDIS_HOST,
             port=settings.REDIS_PORT,
             decode_responses=True,
         )
-        pubsub = r.pubsub()
-        pubsub.subscribe("logs")
+        if settings.LOG_TRANSPORT == "streams":
+            source = StreamSource(r, "logs:stream")
+        else:
+            source = PubSubSource(r, "logs")
     except Exception as e:
         logger.error(f"Failed to connect to Redis: {e}")
         return
@@ -40,40 +245,70 @@ def start_log_worker():
     # Initialize DB tables if not created
     init_db()
     logger.info(
-        "[WORKER] Database initialized. Listening on 'logs' channel..."
+        f"[WORKER] Database initialized. "
+        f"Listening with '{settings.LOG_TRANSPORT}' transport..."
     )
 
-    # Loop to process messages from Redis
-    for message in pubsub.listen():
-        if message.get("type") != "message":
-            continue
+    signal.signal(signal.SIGTERM, _raise_system_exit)
 
-        try:
-            data = json.loads(message["data"])
-
-            log = Log(
-                event=data.get("event"),
-                level=data.get("level"),
-                timestamp=datetime.now(timezone.utc),
-                user=data.get("user"),
-                operation=data.get("operation"),
-                input=json.dumps(data.get("input", {})),
-                result=data.get("result", "no result"),
-            )
-
-            # Save log to DB using context manager
-            with SessionLocal() as db:
-                db.add(log)
-                db.commit()
-
-                # Access values before session closes
-                op = log.operation
-                user = log.user
+    # Rows waiting to be written, with the ids of the entries they came from
+    buffer: List[Dict[str, Any]] = []
+    pending_ids: List[Any] = []
+    last_flush = time.monotonic()
+    last_retention = float("-inf")
+    retention_backlog = False
+    try:
+        # Loop to process messages from Redis
+        while True:
+            elapsed = time.monotonic() - last_flush
+            timeout = max(settings.LOG_FLUSH_INTERVAL_SECONDS - elapsed, 0)
+            full = len(buffer) >= settings.LOG_BUFFER_MAX_ROWS
+            if full and source.durable:
+                # Leave entries in the stream until the database is back
+                time.sleep(timeout)
+                entries = []
+            else:
+                entries = source.read(
+                    timeout=timeout,
+                    count=max(settings.LOG_BATCH_SIZE - len(buffer), 1),
+                )
+            if full and entries:
+                logger.error(
+                    f"[WORKER] Buffer full, dropped {len(entries)} logs"
+                )
+                source.ack([entry_id for entry_id, _ in entries])
+                entries = []
+            for entry_id, raw in entries:
+                try:
+                    row = parse_log_message(raw)
+                except Exception as e:
+                    logger.exception(f"[ERROR] Invalid log message: {e}")
+                    source.ack([entry_id])
+                    continue
+                buffer.append(row)
+                pending_ids.append(entry_id)
 
-            logger.info(f"[LOG SAVED] {op} by {user}")
+            due = (
+                time.monotonic() - last_flush
+                >= settings.LOG_FLUSH_INTERVAL_SECONDS
+            )
+            if len(buffer) >= settings.LOG_BATCH_SIZE or due:
+                # Rows left by a failed flush stay buffered and are retried
+                done = flush_logs(buffer)
+                source.ack(pending_ids[:done])
+                del buffer[:done]
+                del pending_ids[:done]
+                last_flush = time.monotonic()
 
-        except Exception as e:
-            logger.exception(f"[ERROR] Failed to save log: {e}")
+            if retention_backlog or time.monotonic() - last_retention \
+                    >= settings.LOG_RETENTION_INTERVAL_SECONDS:
+                retention_backlog = run_retention()
+                last_retention = time.monotonic()
+    except (KeyboardInterrupt, SystemExit):
+        logger.info("[WORKER] Shutting down...")
+    finally:
+        source.ack(pending_ids[:flush_logs(buffer)])
+        source.close()
 
 
 # Only run if executed directly (not on import)
@@ -0,0 +1,114 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from jose import jwt
+from sqlalchemy.orm import Session
+
+from app.main import app
+from app.db.database import get_db
+from app.db.models.log_model import Log
+from app.db.models.user_model import User
+from app.utils.config import settings
+
+OPERATION = "export_test_op"
+
+client = TestClient(app)
+
+
+# Mocks Redis logging for all tests
+@pytest.fixture(autouse=True)
+def mock_publish_log():
+    with patch("app.controllers.math_controller.publish_log") as mock_log_controller, \
+         patch("app.middleware.error_logging.publish_log") as mock_log_middleware:
+        yield mock_log_middleware
+
+
+# Creates and cleans up a user with the given role
+@pytest.fixture(params=["admin"])
+def test_user(request):
+    db: Session = next(get_db())
+    user = User(
+        username="test_admin",
+        hashed_password="not_used_here",
+        role=request.param,
+    )
+    db.add(user)
+    db.commit()
+    yield user
+    db.delete(user)
+    db.commit()
+
+
+# Generates an Authorization header with a valid JWT for the test user
+@pytest.fixture
+def auth_header(test_user):
+    token = jwt.encode(
+        {"sub": test_user.username, "role": test_user.role},
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+# Inserts three logs for a dedicated operation and removes them afterwards
+@pytest.fixture
+def export_logs():
+    db: Session = next(get_db())
+    start = datetime(2024, 1, 1, 10, 0)
+    db.add_all(
+        Log(
+            event="operation_completed",
+            level="INFO",
+            timestamp=start + timedelta(minutes=i),
+            user="test_admin",
+            operation=OPERATION,
+            input='{"n": 1}',
+            result=str(i),
+        )
+        for i in range(3)
+    )
+    db.commit()
+    yield
+    db.query(Log).filter(Log.operation == OPERATION).delete()
+    db.commit()
+
+
+# Tests that the export streams filtered logs as NDJSON
+def test_export_ndjson(auth_header, export_logs):
+    response = client.get(
+        "/admin/logs/export",
+        params={"operation": OPERATION, "since": "2024-01-01T10:01:00"},
+        headers=auth_header,
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["result"] for r in records] == ["1", "2"]
+
+
+# Tests that the gzip CSV export decompresses to a header and rows
+def test_export_csv_gzip(auth_header, export_logs):
+    response = client.get(
+        "/admin/logs/export",
+        params={"operation": OPERATION, "format": "csv", "gzip": True},
+        headers=auth_header,
+    )
+    assert response.status_code == 200
+    assert "logs.csv.gz" in response.headers["content-disposition"]
+    text = gzip.decompress(response.content).decode()
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert [row["result"] for row in rows] == ["0", "1", "2"]
+
+
+# Tests that non-admin users cannot export logs
+@pytest.mark.parametrize("test_user", ["user"], indirect=True)
+def test_export_requires_admin(auth_header, mock_publish_log):
+    response = client.get("/admin/logs/export", headers=auth_header)
+    assert response.status_code == 403
+    mock_publish_log.assert_called_once()
@@ -1,3 +1,6 @@
+import json
+
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
@@ -5,18 +8,25 @@ from jose import jwt
 from unittest.mock import patch
 
 from app.main import app
+from app.services.admission import AdmissionRejectedError
+from app.services.compute_pool import shutdown_pool
+from app.services.math_service import fibonacci_pair, int_to_decimal
 from app.db.database import get_db
 from app.db.models.user_model import User
 from app.utils.config import settings
 
 
-# Mocks Redis logging and caching for all tests
+# Mocks Redis logging, caching and admission for all tests
 @pytest.fixture
 def mock_publish_log_and_cache():
     with patch("app.controllers.math_controller.publish_log") as mock_log_controller, \
          patch("app.middleware.error_logging.publish_log") as mock_log_middleware, \
          patch("app.services.math_service.get_cached_result", return_value=None) as mock_cache_get, \
-         patch("app.services.math_service.set_cached_result") as mock_cache_set:
+         patch("app.services.math_service.set_cached_result") as mock_cache_set, \
+         patch("app.services.math_service.find_first_cached", return_value=None), \
+         patch("app.services.math_service.get_cached_results", side_effect=lambda keys: [None] * len(keys)), \
+         patch("app.services.math_service.set_cached_results") as mock_cache_set_many, \
+         patch("app.services.admission.try_admit", return_value=None):
         yield
 
 
@@ -67,6 +77,19 @@ def test_fibonacci(auth_header, test_user, client):
     assert data["user"] == test_user.username
 
 
+# Tests that a result past the int/str digit limit is returned as a number
+def test_fibonacci_large_result(auth_header, client):
+    try:
+        response = client.post(
+            "/fibonacci", json={"n": 30000}, headers=auth_header
+        )
+    finally:
+        shutdown_pool()
+    assert response.status_code == 200
+    result = json.loads(response.text, parse_int=str)["result"]
+    assert result == int_to_decimal(fibonacci_pair(30000)[0])
+
+
 # Tests the /power endpoint with base and exponent values
 def test_power(auth_header, test_user, client):
     payload = {"base": 2, "exponent": 3}
@@ -79,6 +102,41 @@ def test_power(auth_header, test_user, client):
     assert data["user"] == test_user.username
 
 
+# Tests the /power/array endpoint with JSON lists
+def test_power_array_json(auth_header, test_user, client):
+    payload = {"bases": [2, 9, -2], "exponents": [3, 0.5, 3]}
+    response = client.post("/power/array", json=payload, headers=auth_header)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["operation"] == "pow_array"
+    assert data["count"] == 3
+    assert data["results"] == [8, 3, -8]
+    assert data["user"] == test_user.username
+
+
+# Tests the /power/array endpoint with packed float64 input and output
+def test_power_array_binary(auth_header, client):
+    body = np.array([[2, 10], [4, -1]], dtype="<f8").tobytes()
+    headers = {
+        **auth_header,
+        "Content-Type": "application/octet-stream",
+        "Accept": "application/octet-stream",
+    }
+    response = client.post("/power/array", content=body, headers=headers)
+    assert response.status_code == 200
+    assert np.frombuffer(response.content, dtype="<f8").tolist() == [
+        1024, 0.25
+    ]
+
+
+# Tests that /power/array reports overflow like the scalar operator
+def test_power_array_overflow(auth_header, client):
+    payload = {"bases": [2, 1e6], "exponents": [2, 1000]}
+    response = client.post("/power/array", json=payload, headers=auth_header)
+    assert response.status_code == 422
+    assert "index 1" in response.json()["detail"]
+
+
 # Tests the /factorial endpoint with a valid input
 def test_factorial(auth_header, test_user, client):
     payload = {"n": 5}
@@ -89,3 +147,42 @@ def test_factorial(auth_header, test_user, client):
     assert data["result"] == 120
     assert data["input"] == {"n": 5}
     assert data["user"] == test_user.username
+
+
+# Tests the /batch endpoint with mixed and duplicated operations
+def test_batch(auth_header, test_user, client):
+    payload = {"operations": [
+        {"operation": "fibonacci", "n": 7},
+        {"operation": "factorial", "n": 5},
+        {"operation": "power", "base": 2, "exponent": 3},
+        {"operation": "fibonacci", "n": 7},
+    ]}
+    with patch("app.services.math_service.set_cached_results") as mock_set:
+        response = client.post("/batch", json=payload, headers=auth_header)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["user"] == test_user.username
+    assert [item["operation"] for item in data["results"]] == [
+        "fib", "factorial", "pow", "fib"
+    ]
+    assert [item["result"] for item in data["results"]] == [13, 120, 8, 13]
+    mock_set.assert_called_once()
+    assert len(mock_set.call_args.args[0]) == 3
+
+
+# Tests that /batch rejects items outside the single-operation limits
+def test_batch_validates_items(auth_header, client):
+    payload = {"operations": [{"operation": "factorial", "n": -1}]}
+    response = client.post("/batch", json=payload, headers=auth_header)
+    assert response.status_code == 422
+
+
+# Tests that a request over its quota gets 429 with Retry-After
+def test_fibonacci_over_quota(auth_header, client):
+    rejection = AdmissionRejectedError("Request quota exceeded.", 3)
+    with patch("app.services.admission.try_admit", side_effect=rejection):
+        response = client.post(
+            "/fibonacci", json={"n": 10000}, headers=auth_header
+        )
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "3"
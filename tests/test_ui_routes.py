@@ -1,7 +1,14 @@
+import asyncio
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock, MagicMock
 from app.main import app
+from app.controllers import ui_controller
+from app.db.repositories.user_repository import UserRecord
+from app.schemas.math_schemas import FibonacciRequest
+from app.services.admission import AdmissionRejectedError
+from app.services.auth_service import UsernameTakenError
 
 
 # Mocks publish_log, Redis cache, and require_user_auth for all UI route tests
@@ -27,7 +34,7 @@ def test_show_login_page(client_with_patch):
 # Tests successful registration (200 + success message)
 def test_register_success(client_with_patch):
     client, _ = client_with_patch
-    with patch("httpx.AsyncClient.post", return_value=MagicMock(status_code=200, json=lambda: {})):
+    with patch("app.controllers.ui_controller.register_user", new_callable=AsyncMock):
         response = client.post("/register", data={"username": "test", "password": "pass"})
     assert response.status_code == 200
     assert "user registered successfully" in response.text.lower()
@@ -36,7 +43,8 @@ def test_register_success(client_with_patch):
 # Tests failed registration due to duplicate username
 def test_register_fail(client_with_patch):
     client, _ = client_with_patch
-    with patch("httpx.AsyncClient.post", return_value=MagicMock(status_code=400)):
+    with patch("app.controllers.ui_controller.register_user",
+               new_callable=AsyncMock, side_effect=UsernameTakenError("test")):
         response = client.post("/register", data={"username": "test", "password": "pass"})
     assert response.status_code == 200
     assert "username already taken" in response.text.lower()
@@ -46,8 +54,8 @@ def test_register_fail(client_with_patch):
 def test_login_success_sets_cookie(client_with_patch):
     client, _ = client_with_patch
     token = "fake.jwt.token"
-    mock_response = MagicMock(status_code=200, json=lambda: {"access_token": token})
-    with patch("httpx.AsyncClient.post", return_value=mock_response):
+    with patch("app.controllers.ui_controller.authenticate_user",
+               new_callable=AsyncMock, return_value=token) as mock_auth:
         response = client.post(
             "/login",
             data={"username": "test_user", "password": "secret"},
@@ -57,6 +65,123 @@ def test_login_success_sets_cookie(client_with_patch):
     assert response.headers["location"] == "/math"
     assert "access_token" in response.cookies
     assert response.cookies["access_token"] == token
+    assert mock_auth.await_args.args[1:] == ("test_user", "secret")
+
+
+# Tests login with the split-deployment dispatch goes through the pooled client
+def test_login_http_dispatch_uses_pooled_client(client_with_patch):
+    client, _ = client_with_patch
+    token = "fake.jwt.token"
+    mock_response = MagicMock(status_code=200, json=lambda: {"access_token": token})
+    with patch.object(ui_controller.settings, "UI_DISPATCH", "http"), \
+         patch("httpx.AsyncClient.post", return_value=mock_response) as mock_post:
+        response = client.post(
+            "/login",
+            data={"username": "test_user", "password": "secret"},
+            follow_redirects=False
+        )
+        api_client = ui_controller.get_api_client()
+    assert response.status_code == 302
+    assert response.cookies["access_token"] == token
+    assert mock_post.call_args.args[0] == "/auth/login"
+    assert api_client is ui_controller.get_api_client()
+    assert str(api_client.base_url).startswith(ui_controller.API_BASE)
+    asyncio.run(ui_controller.close_api_client())
+
+
+# Tests the math form calls the API handler in process with the cookie's user
+def test_math_form_dispatches_in_process(client_with_patch):
+    client, _ = client_with_patch
+    client.cookies.set("access_token", "some_token")
+    user = UserRecord(1, "test_user", "user")
+    with patch("app.controllers.ui_controller.require_user_auth",
+               return_value=("test_user", "user")), \
+         patch("app.controllers.ui_controller.get_current_user",
+               return_value=user) as mock_current_user, \
+         patch("app.services.admission.try_admit", return_value=None), \
+         patch("httpx.AsyncClient.post") as mock_post:
+        response = client.post(
+            "/math", data={"operation": "fibonacci", "n": 10}
+        )
+    assert response.status_code == 200
+    assert "55" in response.text
+    assert mock_current_user.call_args.args[0] == "some_token"
+    mock_post.assert_not_called()
+
+
+# Tests an admission rejection shows an error instead of a result
+def test_math_form_shows_error_when_rejected(client_with_patch):
+    client, _ = client_with_patch
+    user = UserRecord(1, "test_user", "user")
+    with patch("app.controllers.ui_controller.require_user_auth",
+               return_value=("test_user", "user")), \
+         patch("app.controllers.ui_controller.get_current_user",
+               return_value=user), \
+         patch.dict(ui_controller.MATH_HANDLERS, {
+             "fibonacci": (
+                 AsyncMock(side_effect=AdmissionRejectedError("busy", 1)),
+                 FibonacciRequest,
+             ),
+         }):
+        response = client.post(
+            "/math", data={"operation": "fibonacci", "n": 10}
+        )
+    assert response.status_code == 200
+    assert "request failed" in response.text.lower()
+
+
+# Tests that a power input failing inside the handler shows the form error
+@pytest.mark.parametrize("base, exponent", [
+    (1e6, 1000),
+    (0, -1),
+    (-8, 0.5),
+])
+def test_math_form_shows_error_for_failing_power(
+    client_with_patch, base, exponent
+):
+    client, _ = client_with_patch
+    user = UserRecord(1, "test_user", "user")
+    with patch("app.controllers.ui_controller.require_user_auth",
+               return_value=("test_user", "user")), \
+         patch("app.controllers.ui_controller.get_current_user",
+               return_value=user), \
+         patch("app.services.admission.try_admit", return_value=None), \
+         patch("app.controllers.ui_controller.log_error") as mock_log:
+        response = client.post(
+            "/math",
+            data={"operation": "power", "base": base, "exponent": exponent},
+        )
+    assert response.status_code == 200
+    assert "text/html" in response.headers["content-type"]
+    assert "request failed" in response.text.lower()
+    assert mock_log.call_args.args[1] == 500
+
+
+# Tests that subclasses of the handled errors map onto their base's status
+def test_math_form_handles_error_subclasses(client_with_patch):
+    client, _ = client_with_patch
+    user = UserRecord(1, "test_user", "user")
+
+    class CustomHTTPException(HTTPException):
+        pass
+
+    with patch("app.controllers.ui_controller.require_user_auth",
+               return_value=("test_user", "user")), \
+         patch("app.controllers.ui_controller.get_current_user",
+               return_value=user), \
+         patch("app.controllers.ui_controller.log_error") as mock_log, \
+         patch.dict(ui_controller.MATH_HANDLERS, {
+             "fibonacci": (
+                 AsyncMock(side_effect=CustomHTTPException(418)),
+                 FibonacciRequest,
+             ),
+         }):
+        response = client.post(
+            "/math", data={"operation": "fibonacci", "n": 10}
+        )
+    assert response.status_code == 200
+    assert "request failed" in response.text.lower()
+    assert mock_log.call_args.args[1] == 418
 
 
 # Tests that logout removes the access_token cookie and redirects
@@ -69,6 +194,17 @@ def test_logout_deletes_cookie(client_with_patch):
     assert "access_token" not in response.cookies or response.cookies["access_token"] == ""
 
 
+# Tests that UI logout revokes the token held in the cookie
+def test_logout_revokes_token(client_with_patch):
+    client, _ = client_with_patch
+    client.cookies.set("access_token", "some_token")
+    with patch("app.controllers.ui_controller.revoke_access_token",
+               new_callable=AsyncMock) as mock_revoke:
+        response = client.post("/logout", follow_redirects=False)
+    assert response.status_code == 302
+    mock_revoke.assert_awaited_once_with("some_token")
+
+
 # Tests redirect to /login when accessing /math without authentication
 def test_math_page_requires_login(client_with_patch):
     client, mock_guard = client_with_patch
@@ -0,0 +1,62 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services.admission import (
+    AdmissionRejectedError,
+    admission,
+    try_admit,
+)
+
+
+# Provides a mocked Redis client whose script returns the given reply
+def mock_redis(reply):
+    client = MagicMock()
+    client.eval = AsyncMock(return_value=reply)
+    client.zrem = AsyncMock()
+    return client
+
+
+# Tests that cheap requests only charge the quota and take no slot
+def test_try_admit_cheap_request():
+    client = mock_redis([1, 0])
+    with patch("app.services.admission.r", client):
+        assert asyncio.run(try_admit("alice", 10)) is None
+    args = client.eval.call_args.args
+    assert args[2] == "quota:alice"
+    assert args[7] == 0
+
+
+# Tests that heavy requests hold a concurrency slot until they finish
+def test_admission_releases_slot_of_heavy_request():
+    client = mock_redis([1, 0])
+
+    async def run():
+        async with admission("alice", 10**7):
+            pass
+
+    with patch("app.services.admission.r", client):
+        asyncio.run(run())
+    slot = client.eval.call_args.args[8]
+    client.zrem.assert_awaited_once_with("admission:inflight", slot)
+
+
+# Tests the retry delay reported for quota and concurrency rejections
+@pytest.mark.parametrize("reply, retry_after", [
+    ([0, 2500], 3),
+    ([0, -1], 1),
+])
+def test_try_admit_rejects(reply, retry_after):
+    with patch("app.services.admission.r", mock_redis(reply)):
+        with pytest.raises(AdmissionRejectedError) as exc_info:
+            asyncio.run(try_admit("alice", 10**7))
+    assert exc_info.value.retry_after == retry_after
+
+
+# Tests that requests are admitted when Redis is unavailable
+def test_try_admit_fails_open():
+    client = MagicMock()
+    client.eval = AsyncMock(side_effect=ConnectionError)
+    with patch("app.services.admission.r", client):
+        assert asyncio.run(try_admit("alice", 10)) is None
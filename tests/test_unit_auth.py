@@ -1,16 +1,34 @@
+import asyncio
+import time
+
 import pytest
+from jose import jwt
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
-from app.auth.dependencies import get_current_user
+from app.auth.dependencies import get_current_user, token_cache
+from app.db.repositories.user_repository import create_user, user_cache
 from app.auth.jwt_utils import JWTUtils
+from app.auth.revocation import is_revoked, sync_revocations
+from app.auth.ui_auth_guard import require_user_auth
 from app.db.models.user_model import User
 from app.db.database import get_db
 from app.auth.password_utils import get_password_hash, verify_password
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, patch
+
+
+# Starts every test with empty token and user caches
+@pytest.fixture(autouse=True)
+def clear_auth_caches():
+    token_cache.clear()
+    user_cache.clear()
+    yield
+    token_cache.clear()
+    user_cache.clear()
 
 
 # Dummy user class used for mocking database result
 class DummyUser:
+    id = 1
     username = "test_user"
     role = "user"
     hashed_password = "hashed_pwd"
@@ -32,10 +50,21 @@ class DummyQuery:
 class DummyDB:
     def __init__(self, has_user=True):
         self.has_user = has_user
+        self.queries = 0
 
     def query(self, model):
+        self.queries += 1
         return DummyQuery(has_user=self.has_user)
 
+    def add(self, obj):
+        pass
+
+    def commit(self):
+        pass
+
+    def refresh(self, obj):
+        pass
+
 
 # Tests user extraction from a valid token and mock DB
 def test_get_current_user_with_valid_token():
@@ -67,6 +96,99 @@ def test_get_current_user_with_unknown_user():
     assert exc_info.value.status_code == 401
 
 
+# Tests that a repeat token skips verification and the database
+def test_get_current_user_caches_token_and_user():
+    token = JWTUtils.create_access_token(
+        {"sub": "test_user", "role": "user"},
+        expires_minutes=5
+    )
+    db = DummyDB(has_user=True)
+    get_current_user(token=token, db=db)
+    with patch("app.auth.dependencies.jwt.decode") as mock_decode:
+        user = get_current_user(token=token, db=db)
+    mock_decode.assert_not_called()
+    assert user.username == "test_user"
+    assert db.queries == 1
+
+
+# Tests that creating a user drops its cached snapshot
+def test_create_user_invalidates_cached_user():
+    token = JWTUtils.create_access_token(
+        {"sub": "test_user", "role": "user"},
+        expires_minutes=5
+    )
+    db = DummyDB(has_user=True)
+    get_current_user(token=token, db=db)
+    create_user(db, "test_user", "hashed_pwd")
+    get_current_user(token=token, db=db)
+    assert db.queries == 2
+
+
+# Tests that a cached token expires together with the token itself
+def test_token_cache_entry_expires_at_token_exp():
+    token = JWTUtils.create_access_token(
+        {"sub": "test_user", "role": "user"},
+        expires_minutes=5
+    )
+    get_current_user(token=token, db=DummyDB())
+    now = time.monotonic()
+    with patch("app.utils.cache.time.monotonic", return_value=now + 290):
+        assert token_cache.get(token)[:2] == ("test_user", "user")
+    with patch("app.utils.cache.time.monotonic", return_value=now + 301):
+        assert token_cache.get(token) is None
+
+
+# Tests that stateless mode builds the user from claims without the DB
+def test_get_current_user_stateless_mode():
+    token = JWTUtils.create_access_token(
+        {"sub": "test_user", "role": "admin"},
+        expires_minutes=5
+    )
+    db = DummyDB(has_user=False)
+    with patch("app.auth.dependencies.settings.AUTH_STATELESS", True):
+        user = get_current_user(token=token, db=db)
+    assert (user.username, user.role) == ("test_user", "admin")
+    assert db.queries == 0
+
+
+# Tests that a revoked token is rejected even when cached
+def test_get_current_user_rejects_revoked_token():
+    token = JWTUtils.create_access_token(
+        {"sub": "test_user", "role": "user"},
+        expires_minutes=5
+    )
+    get_current_user(token=token, db=DummyDB())
+    jti = jwt.get_unverified_claims(token)["jti"]
+    with patch("app.auth.revocation._revoked", frozenset({jti})):
+        with pytest.raises(HTTPException) as exc_info:
+            get_current_user(token=token, db=DummyDB())
+    assert exc_info.value.status_code == 401
+
+
+# Tests that the UI guard rejects a revoked admin token
+def test_require_user_auth_rejects_revoked_token():
+    token = JWTUtils.create_access_token(
+        {"sub": "test_admin", "role": "admin"},
+        expires_minutes=5
+    )
+    request = MagicMock(cookies={"access_token": token})
+    assert require_user_auth(request) == ("test_admin", "admin")
+    jti = jwt.get_unverified_claims(token)["jti"]
+    with patch("app.auth.revocation._revoked", frozenset({jti})):
+        assert require_user_auth(request) is None
+
+
+# Tests that the revocation set syncs from Redis, dropping expired ids
+@patch("app.auth.revocation.r", new_callable=MagicMock)
+def test_sync_revocations(mock_redis):
+    pipe = mock_redis.pipeline.return_value
+    pipe.execute = AsyncMock(return_value=[1, [b"abc", b"def"]])
+    with patch("app.auth.revocation._revoked", frozenset()):
+        asyncio.run(sync_revocations())
+        assert is_revoked("abc") and not is_revoked("xyz")
+    pipe.zremrangebyscore.assert_called_once()
+
+
 # Tests token creation and decoding
 def test_create_and_decode_token_success():
     data = {"sub": "maria", "role": "admin"}
@@ -0,0 +1,54 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.utils.cache import LocalCache, find_first_cached
+
+
+# Tests that the least recently used entry is evicted past max_entries
+def test_local_cache_evicts_least_recently_used():
+    cache = LocalCache(max_entries=2, max_bytes=1024)
+    cache.set("a", "1", ttl=60)
+    cache.set("b", "2", ttl=60)
+    assert cache.get("a") == "1"
+    cache.set("c", "3", ttl=60)
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+
+# Tests that entries are evicted to stay under max_bytes
+def test_local_cache_respects_byte_limit():
+    cache = LocalCache(max_entries=10, max_bytes=10)
+    cache.set("a", "x" * 6, ttl=60)
+    cache.set("b", "y" * 6, ttl=60)
+    assert cache.get("a") is None
+    assert cache.get("b") == "y" * 6
+    assert cache.total_bytes == 6
+
+    cache.set("c", "z" * 11, ttl=60)
+    assert cache.get("c") is None
+
+
+# Tests that entries expire after their TTL
+def test_local_cache_expires_entries():
+    cache = LocalCache(max_entries=10, max_bytes=1024)
+    with patch("app.utils.cache.time.monotonic", return_value=100.0):
+        cache.set("a", "1", ttl=5)
+    with patch("app.utils.cache.time.monotonic", return_value=104.0):
+        assert cache.get("a") == "1"
+    with patch("app.utils.cache.time.monotonic", return_value=105.0):
+        assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+# Tests that the first present key is found with one pipeline of EXISTS
+@patch("app.utils.cache.r", new_callable=MagicMock)
+def test_find_first_cached(mock_redis):
+    pipe = mock_redis.pipeline.return_value
+    pipe.execute = AsyncMock(return_value=[0, 1, 1])
+    assert asyncio.run(find_first_cached(["a", "b", "c"])) == 1
+    assert pipe.exists.call_count == 3
+    pipe.get.assert_not_called()
+
+    pipe.execute = AsyncMock(return_value=[0, 0])
+    assert asyncio.run(find_first_cached(["a", "b"])) is None
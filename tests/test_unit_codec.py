@@ -0,0 +1,48 @@
+import math
+
+import pytest
+
+from app.utils.codec import (
+    CODEC_VERSION,
+    decode_cost,
+    decode_value,
+    encode_value,
+)
+
+
+# Tests that supported values survive an encode/decode round trip
+@pytest.mark.parametrize("value", [
+    0, 1, -1, 255, -256, 2**64, -(3**500), math.factorial(1000),
+    0.5, -1e300, float("inf"),
+    [0, 1], [math.factorial(1000), -7],
+    "text", {"a": 1}, None, True,
+])
+def test_encode_decode_round_trip(value):
+    encoded = encode_value(value)
+    assert encoded[:1] == CODEC_VERSION
+    decoded = decode_value(encoded)
+    assert decoded == value
+    assert type(decoded) is type(value)
+
+
+# Tests that large compressible integers are stored compressed
+def test_encode_compresses_large_integers():
+    value = 1 << 200_000
+    assert len(encode_value(value)) < value.bit_length() // 8 // 10
+
+
+# Tests that legacy JSON entries still decode, as str or bytes
+def test_decode_legacy_json_entries():
+    assert decode_value("456") == 456
+    assert decode_value(b"[1, 2]") == [1, 2]
+    assert decode_value(b"2.5") == 2.5
+    assert decode_cost(b"123456") > 0
+    assert decode_cost(encode_value(123456)) == 0
+
+
+# Tests that undecodable values raise ValueError
+def test_decode_invalid_value_raises():
+    with pytest.raises(ValueError):
+        decode_value(b"not json")
+    with pytest.raises(ValueError):
+        decode_value(CODEC_VERSION + b"?")
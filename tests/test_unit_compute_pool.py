@@ -0,0 +1,102 @@
+import asyncio
+import math
+import sys
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.services import compute_pool
+from app.services.compute_pool import (
+    ComputeOverloadedError,
+    ComputeTimeoutError,
+    run_in_pool,
+    shutdown_pool,
+)
+from app.utils.config import settings
+from app.services.math_service import (
+    calculate_batch,
+    format_decimal,
+    int_to_decimal,
+    range_product,
+)
+
+
+# Shuts the pool down after each test so no worker outlives it, waiting
+# for abandoned jobs to release their slots
+@pytest.fixture(autouse=True)
+def pool_cleanup():
+    yield
+    shutdown_pool()
+    for _ in range(100):
+        if compute_pool._pending == 0:
+            break
+        time.sleep(0.05)
+
+
+# Tests that a job runs in the pool and returns its result
+def test_run_in_pool_returns_result():
+    result = asyncio.run(run_in_pool(range_product, 2, 500))
+    assert result == math.factorial(500)
+
+
+# Tests that a job past its deadline raises ComputeTimeoutError
+def test_run_in_pool_enforces_deadline():
+    with pytest.raises(ComputeTimeoutError):
+        asyncio.run(run_in_pool(time.sleep, 0.5, deadline=0.1))
+
+
+# Tests that a job running past its deadline keeps its slot until it ends
+def test_run_in_pool_keeps_slot_of_abandoned_job():
+    async def run():
+        await run_in_pool(range_product, 2, 10)
+        with pytest.raises(ComputeTimeoutError):
+            await run_in_pool(time.sleep, 0.5, deadline=0.1)
+        assert compute_pool._pending == 1
+        for _ in range(100):
+            if compute_pool._pending == 0:
+                break
+            await asyncio.sleep(0.05)
+        assert compute_pool._pending == 0
+
+    asyncio.run(run())
+
+
+# Tests that a batch with more heavy misses than pending slots succeeds
+@patch("app.services.math_service.set_cached_results")
+@patch("app.services.math_service.get_cached_results",
+       side_effect=lambda keys: [None] * len(keys))
+def test_calculate_batch_fits_pool_capacity(mock_get, mock_set):
+    operations = [
+        ("factorial", {"n": 20_000 + i}) for i in range(40)
+    ]
+    with patch.object(settings, "CHECKPOINT_INTERVAL", 0):
+        results = asyncio.run(calculate_batch(operations))
+    assert results[0] == math.factorial(20_000)
+    assert len(results) == 40
+
+
+# Tests that jobs beyond the pending limit are rejected
+def test_run_in_pool_rejects_when_overloaded():
+    with patch.object(compute_pool, "_pending", 10**6):
+        with pytest.raises(ComputeOverloadedError):
+            asyncio.run(run_in_pool(range_product, 2, 10))
+
+
+# Tests that large integers are rendered in the pool without lifting the
+# digit limit of this process
+def test_format_decimal_converts_large_ints_in_pool():
+    value = range_product(2, 5000)
+    limit = sys.get_int_max_str_digits()
+    text = asyncio.run(format_decimal(value))
+    assert len(text) == 16326
+    assert text == int_to_decimal(value)
+    assert sys.get_int_max_str_digits() == limit
+
+
+# Tests that small results are rendered inline
+def test_format_decimal_keeps_small_values_inline():
+    with patch("app.services.math_service.run_in_pool") as mock_pool:
+        assert asyncio.run(format_decimal(55)) == "55"
+        assert asyncio.run(format_decimal(2.5)) == "2.5"
+    mock_pool.assert_not_called()
@@ -0,0 +1,25 @@
+from sqlalchemy import text
+
+from app.db.database import create_db_engine
+
+
+# Tests that file databases get WAL and the configured pragmas
+def test_sqlite_profile_pragmas(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    with engine.connect() as conn:
+        def pragma(name):
+            return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1
+        assert pragma("busy_timeout") == 5000
+    engine.dispose()
+
+
+# Tests that the worker role gets a single pooled connection
+def test_worker_pool_size(tmp_path):
+    engine = create_db_engine(
+        f"sqlite:///{tmp_path / 'test.db'}", role="worker"
+    )
+    assert engine.pool.size() == 1
+    engine.dispose()
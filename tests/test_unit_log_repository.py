@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base
+from app.db.models.log_model import Log
+from app.db.repositories.log_repository import get_logs_page
+
+
+# Provides a session on an in-memory database with 25 logs, several of
+# them sharing a timestamp
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Log.__table__])
+    start = datetime(2024, 1, 1, 10, 0)
+    with sessionmaker(bind=engine)() as session:
+        session.add_all(
+            Log(
+                event="operation_completed",
+                level="ERROR" if i % 5 == 0 else "INFO",
+                timestamp=start + timedelta(minutes=i // 3),
+                user="alice" if i % 2 else "bob",
+                operation="fibonacci",
+                input="{}",
+                result="1",
+            )
+            for i in range(25)
+        )
+        session.commit()
+        yield session
+
+
+# Tests that following cursors visits every log once, newest first
+def test_get_logs_page_walks_all_rows(db):
+    seen, cursor = [], None
+    while True:
+        logs, cursor = get_logs_page(db, cursor=cursor, page_size=10)
+        seen.extend(logs)
+        if cursor is None:
+            break
+    keys = [(log.timestamp, log.id) for log in seen]
+    assert len(seen) == 25
+    assert keys == sorted(keys, reverse=True)
+
+
+# Tests filtering by user, level and time range
+def test_get_logs_page_filters(db):
+    logs, cursor = get_logs_page(db, user="alice", level="ERROR")
+    assert {log.id for log in logs} == {6, 16}
+    assert cursor is None
+
+    logs, _ = get_logs_page(
+        db,
+        since=datetime(2024, 1, 1, 10, 1),
+        until=datetime(2024, 1, 1, 10, 2),
+    )
+    assert len(logs) == 3
+
+
+# Tests that a malformed cursor is rejected
+def test_get_logs_page_rejects_bad_cursor(db):
+    with pytest.raises(ValueError):
+        get_logs_page(db, cursor="not-a-cursor")
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import threading
+from unittest.mock import AsyncMock, patch
+
+from app.utils.log_spool import LogSpool
+from app.utils.logger import (
+    CircuitBreaker,
+    LogPublisher,
+    build_log_message,
+    format_log_result,
+    replay_spool,
+    send_batch,
+)
+
+
+# Tests that queued messages are sent in batches and flushed on stop
+@patch("app.utils.logger.send_batch")
+def test_publisher_batches_and_flushes_on_stop(mock_send):
+    async def run():
+        publisher = LogPublisher()
+        publisher.start()
+        for i in range(5):
+            await publisher.publish("logs", {"i": i})
+        await publisher.stop()
+
+    asyncio.run(run())
+    sent = [msg["i"] for call in mock_send.call_args_list
+            for _, msg in call.args[0]]
+    assert sent == [0, 1, 2, 3, 4]
+    assert mock_send.call_count < 5
+
+
+# Tests the drop overflow policy when the queue is full
+@patch("app.utils.logger.send_batch")
+def test_publisher_drops_on_overflow(mock_send):
+    async def run():
+        publisher = LogPublisher()
+        with patch("app.utils.logger.settings.LOG_QUEUE_MAXSIZE", 1):
+            publisher.start()
+        await publisher.publish("logs", {"i": 0})
+        await publisher.publish("logs", {"i": 1})
+        await publisher.stop()
+
+    asyncio.run(run())
+    sent = [msg for call in mock_send.call_args_list for msg in call.args[0]]
+    assert sent == [("logs", {"i": 0})]
+
+
+# Tests the spill overflow policy writes structured records to the spool
+@patch("app.utils.logger.send_batch")
+def test_publisher_spills_on_overflow(mock_send, tmp_path):
+    spill_path = tmp_path / "spool.ndjson"
+
+    async def run():
+        publisher = LogPublisher()
+        with patch("app.utils.logger.settings.LOG_QUEUE_MAXSIZE", 1):
+            publisher.start()
+        await publisher.publish("logs", {"i": 0})
+        await publisher.publish("logs", {"i": 1})
+        await publisher.stop()
+
+    with patch("app.utils.logger.settings.LOG_QUEUE_OVERFLOW", "spill"), \
+         patch("app.utils.logger.spool", LogSpool(str(spill_path))):
+        asyncio.run(run())
+    lines = spill_path.read_text().splitlines()
+    records = [json.loads(line) for line in lines]
+    assert records == [{"channel": "logs", "message": {"i": 1}}]
+
+
+# Tests that failed publishes are spooled, the breaker then skips Redis,
+# and the spool is replayed once Redis is back
+def test_spool_and_replay_after_outage(tmp_path):
+    spool = LogSpool(str(tmp_path / "spool.ndjson"))
+    execute = AsyncMock(side_effect=ConnectionError)
+
+    async def run():
+        for i in range(4):
+            await send_batch([("logs", {"i": i})])
+        execute.side_effect = None
+        with patch("app.utils.logger.settings.LOG_BREAKER_RESET_SECONDS", 0):
+            return await replay_spool()
+
+    with patch("app.utils.logger.spool", spool), \
+         patch("app.utils.logger.breaker", CircuitBreaker()), \
+         patch("app.utils.logger.execute_batch", execute), \
+         patch("app.utils.logger.settings.LOG_BREAKER_FAILURE_THRESHOLD", 3):
+        assert asyncio.run(run()) == 4
+    # Three failed attempts open the breaker; the fourth skips Redis
+    assert execute.call_count == 3 + 1
+    replayed = execute.call_args.args[0]
+    assert replayed == [("logs", {"i": i}) for i in range(4)]
+    assert not spool.pending()
+
+
+# Tests that a failed replay keeps the records not yet sent
+def test_replay_keeps_unsent_records(tmp_path):
+    spool = LogSpool(str(tmp_path / "spool.ndjson"))
+    spool.append([("logs", {"i": i}) for i in range(5)])
+    execute = AsyncMock(side_effect=[None, ConnectionError])
+
+    with patch("app.utils.logger.spool", spool), \
+         patch("app.utils.logger.breaker", CircuitBreaker()), \
+         patch("app.utils.logger.execute_batch", execute), \
+         patch("app.utils.logger.settings.LOG_PUBLISH_BATCH_SIZE", 2):
+        assert asyncio.run(replay_spool()) == 2
+    remaining = [batch for _, batch in spool.read_replay(10)]
+    assert remaining == [[("logs", {"i": i}) for i in range(2, 5)]]
+
+
+# Tests that the spool file is read off the event loop thread
+def test_replay_reads_spool_in_worker_thread(tmp_path):
+    spool = LogSpool(str(tmp_path / "spool.ndjson"))
+    spool.append([("logs", {"i": i}) for i in range(5)])
+    read_replay = spool.read_replay
+    reader_threads = []
+
+    def tracked_read_replay(batch_size):
+        for item in read_replay(batch_size):
+            reader_threads.append(threading.get_ident())
+            yield item
+
+    with patch("app.utils.logger.spool", spool), \
+         patch.object(spool, "read_replay", tracked_read_replay), \
+         patch("app.utils.logger.breaker", CircuitBreaker()), \
+         patch("app.utils.logger.execute_batch", AsyncMock()), \
+         patch("app.utils.logger.settings.LOG_PUBLISH_BATCH_SIZE", 2):
+        assert asyncio.run(replay_spool()) == 5
+    assert len(reader_threads) == 3
+    assert threading.get_ident() not in reader_threads
+    assert not spool.pending()
+
+
+# Tests that huge integer results are summarised in log messages
+def test_build_log_message_summarises_huge_results():
+    assert build_log_message("fib", {"n": 7}, 13, "u")["result"] == "13"
+    summary = format_log_result(10 ** 5000)
+    assert summary == "<integer with about 5,001 digits>"
@@ -0,0 +1,62 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.auth import password_utils
+from app.auth.password_utils import (
+    PasswordHashingOverloadedError,
+    hash_password_async,
+    run_hashing,
+    verify_password_async,
+)
+
+
+# Tests that hashing and verification run on the bcrypt executor
+def test_hash_and_verify_async():
+    async def run():
+        hashed = await hash_password_async("secret")
+        return (
+            await verify_password_async("secret", hashed),
+            await verify_password_async("wrong", hashed),
+        )
+
+    with patch.object(password_utils.pwd_context, "hash",
+                      wraps=password_utils.pwd_context.hash) as mock_hash:
+        assert asyncio.run(run()) == (True, False)
+    assert mock_hash.call_count == 1
+
+
+# Tests that requests beyond the pending limit are shed at once
+def test_run_hashing_rejects_when_overloaded():
+    with patch.object(password_utils, "_pending", 10**6):
+        with pytest.raises(PasswordHashingOverloadedError):
+            asyncio.run(run_hashing(time.sleep, 0))
+
+
+# Tests that a job queued past the timeout is dropped unstarted, and that
+# its caller is told at the timeout rather than when a worker frees up
+def test_run_hashing_drops_jobs_queued_too_long():
+    ran = []
+
+    async def late():
+        started = time.monotonic()
+        try:
+            await run_hashing(ran.append, "late")
+        except PasswordHashingOverloadedError as exc:
+            return exc, time.monotonic() - started
+
+    async def run():
+        blocker = [
+            run_hashing(time.sleep, 0.5)
+            for _ in range(password_utils.settings.PASSWORD_HASH_WORKERS)
+        ]
+        return await asyncio.gather(*blocker, late())
+
+    with patch.object(password_utils.settings,
+                      "PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS", 0.1):
+        error, waited = asyncio.run(run())[-1]
+    assert isinstance(error, PasswordHashingOverloadedError)
+    assert waited < 0.4
+    assert ran == []
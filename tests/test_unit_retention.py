@@ -0,0 +1,80 @@
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base
+from app.db.models.log_model import Log
+from app.services.log_retention import (
+    archive_old_logs,
+    append_to_archive,
+    list_archives,
+    read_archives,
+)
+
+NOW = datetime(2024, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+# Points the archive directory at a temporary path with small chunks
+@pytest.fixture(autouse=True)
+def archive_dir(tmp_path):
+    with patch("app.services.log_retention.settings.LOG_ARCHIVE_DIR",
+               str(tmp_path)), \
+         patch("app.services.log_retention.settings.LOG_RETENTION_DAYS", 30), \
+         patch("app.services.log_retention.settings."
+               "LOG_RETENTION_CHUNK_SIZE", 3):
+        yield tmp_path
+
+
+# Provides a session holding 4 logs on each of 2 expired days and 2 recent
+# logs
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Log.__table__])
+    days = [datetime(2024, 1, 10, 8), datetime(2024, 1, 11, 8)]
+    stamps = [day + timedelta(minutes=i) for day in days for i in range(4)]
+    stamps += [datetime(2024, 2, 28, 8)] * 2
+    with sessionmaker(bind=engine)() as session:
+        session.add_all(
+            Log(
+                timestamp=ts,
+                level="INFO",
+                user="alice",
+                operation="fibonacci" if i % 2 else "power",
+                result=str(i),
+            )
+            for i, ts in enumerate(stamps)
+        )
+        session.commit()
+        yield session
+
+
+# Tests that expired logs move to one archive per day and recent ones stay
+def test_archive_old_logs(db):
+    assert archive_old_logs(db, now=NOW) == 8
+    assert db.query(Log).count() == 2
+    assert [a["day"] for a in list_archives()] == [
+        date(2024, 1, 10), date(2024, 1, 11)
+    ]
+    records = list(read_archives(date(2024, 1, 1), date(2024, 1, 31)))
+    assert [r["result"] for r in records] == [str(i) for i in range(8)]
+
+
+# Tests that one call moves at most max_chunks chunks
+def test_archive_old_logs_caps_chunks(db):
+    assert archive_old_logs(db, now=NOW, max_chunks=2) == 6
+    assert db.query(Log).count() == 4
+    assert archive_old_logs(db, now=NOW, max_chunks=2) == 2
+    assert db.query(Log).count() == 2
+
+
+# Tests that archive queries filter records and skip re-archived ids
+def test_read_archives_filters_and_dedupes(db):
+    archive_old_logs(db, now=NOW)
+    day = date(2024, 1, 10)
+    append_to_archive(day, [{"id": 2, "operation": "power"}])
+    records = list(read_archives(day, day, operation="power"))
+    assert [r["id"] for r in records] == [1, 3]
@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base
+from app.db.models.log_rollup_model import LogRollup
+from app.db.repositories.rollup_repository import (
+    aggregate_rollups,
+    bucket_start,
+    get_rollup_summary,
+    upsert_rollups,
+)
+
+
+# Builds a worker row for the given operation and level
+def make_row(operation, level="INFO", minute=5):
+    return {
+        "event": "operation_completed",
+        "level": level,
+        "timestamp": datetime(2024, 1, 1, 10, minute, 30, tzinfo=timezone.utc),
+        "user": "test_user",
+        "operation": operation,
+    }
+
+
+# Tests that timestamps are truncated to naive minute and hour buckets
+def test_bucket_start():
+    ts = datetime(2024, 1, 1, 10, 5, 30, 123, tzinfo=timezone.utc)
+    assert bucket_start(ts, "minute") == datetime(2024, 1, 1, 10, 5)
+    assert bucket_start(ts, "hour") == datetime(2024, 1, 1, 10, 0)
+
+
+# Tests that rows are counted per bucket and errors are tallied apart
+def test_aggregate_rollups():
+    rows = [
+        make_row("fib"),
+        make_row("fib", minute=6),
+        make_row("fib", level="ERROR"),
+    ]
+    rollups = aggregate_rollups(rows)
+    hour = datetime(2024, 1, 1, 10, 0)
+    dims = ("fib", "test_user")
+    assert rollups[("hour", hour, *dims, "INFO", "operation_completed")] \
+        == (2, 0)
+    assert rollups[("hour", hour, *dims, "ERROR", "operation_completed")] \
+        == (1, 1)
+    assert len([key for key in rollups if key[0] == "minute"]) == 3
+
+
+# Tests that repeated upserts add to the existing bucket counts
+def test_upsert_rollups_accumulates():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[LogRollup.__table__])
+    with sessionmaker(bind=engine)() as db:
+        upsert_rollups(db, [make_row("fib"), make_row("pow")])
+        upsert_rollups(db, [make_row("fib"), make_row("fib", "ERROR")])
+        db.commit()
+        summary = get_rollup_summary(db, since=datetime(2024, 1, 1))
+    assert summary == [
+        {"operation": "fib", "count": 3, "errors": 1},
+        {"operation": "pow", "count": 1, "errors": 0},
+    ]
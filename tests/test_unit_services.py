@@ -1,3 +1,7 @@
+import asyncio
+import math
+
+import numpy as np
 import pytest
 from unittest.mock import patch
 from app.services.math_service import (
@@ -5,34 +9,150 @@ from app.services.math_service import (
     calculate_factorial,
     calculate_power,
     cache_or_compute,
+    calculate_batch,
+    calculate_power_array,
+    fibonacci_pair,
+    range_product,
 )
+from app.services import math_service
+from app.utils.codec import decode_value, encode_value
+from app.utils.config import settings
+
+
+# Answers key-presence lookups from the patched get_cached_result, so the
+# tests never reach Redis
+@pytest.fixture(autouse=True)
+def mock_find_first_cached():
+    async def find_first_cached(keys):
+        for i, key in enumerate(keys):
+            if await math_service.get_cached_result(key) is not None:
+                return i
+        return None
+
+    with patch("app.services.math_service.find_first_cached",
+               side_effect=find_first_cached):
+        yield
 
 
 # Tests that fibonacci(5) returns 5 and result is cached
 @patch("app.services.math_service.set_cached_result")
 @patch("app.services.math_service.get_cached_result", return_value=None)
 def test_calculate_fibonacci_returns_correct_result(mock_get, mock_set):
-    result = calculate_fibonacci(5)
+    result = asyncio.run(calculate_fibonacci(5))
     assert result == 5
     mock_get.assert_called_once()
     mock_set.assert_called_once()
 
 
+# Tests that the fast-doubling engine matches the iterative definition
+@patch("app.services.math_service.set_cached_result")
+@patch("app.services.math_service.get_cached_result", return_value=None)
+def test_calculate_fibonacci_matches_iterative(mock_get, mock_set):
+    a, b = 0, 1
+    for n in range(200):
+        assert asyncio.run(calculate_fibonacci(n)) == a
+        a, b = b, a + b
+
+
 # Tests that negative input raises ValueError in fibonacci()
 @patch("app.services.math_service.set_cached_result")
 @patch("app.services.math_service.get_cached_result", return_value=None)
 def test_calculate_fibonacci_negative_raises(mock_get, mock_set):
     with pytest.raises(ValueError):
-        calculate_fibonacci(-3)
+        asyncio.run(calculate_fibonacci(-3))
 
 
 # Tests correct results for factorial of 0, 1, 5
 @patch("app.services.math_service.set_cached_result")
 @patch("app.services.math_service.get_cached_result", return_value=None)
 def test_calculate_factorial_returns_correct_result(mock_get, mock_set):
-    assert calculate_factorial(0) == 1
-    assert calculate_factorial(1) == 1
-    assert calculate_factorial(5) == 120
+    assert asyncio.run(calculate_factorial(0)) == 1
+    assert asyncio.run(calculate_factorial(1)) == 1
+    assert asyncio.run(calculate_factorial(5)) == 120
+
+
+# Tests that the product-tree engine matches math.factorial
+@patch("app.services.math_service.set_cached_result")
+@patch("app.services.math_service.get_cached_result", return_value=None)
+def test_calculate_factorial_matches_math_factorial(mock_get, mock_set):
+    for n in (2, 16, 17, 100, 1000, 5000):
+        assert asyncio.run(calculate_factorial(n)) == math.factorial(n)
+
+
+# Tests that a factorial miss resumes from the cached checkpoint
+@patch("app.services.math_service.set_cached_result")
+@patch("app.services.math_service.get_cached_result")
+def test_calculate_factorial_resumes_from_checkpoint(mock_get, mock_set):
+    checkpoint_key = 'factorial_checkpoint:{"k": 256}'
+    mock_get.side_effect = lambda key: (
+        str(math.factorial(256)) if key == checkpoint_key else None
+    )
+    with patch("app.services.math_service.range_product",
+               wraps=range_product) as mock_product:
+        assert asyncio.run(calculate_factorial(300)) == math.factorial(300)
+    assert mock_product.call_args_list[0].args == (257, 300)
+    assert all(call.args[0] > 256 for call in mock_product.call_args_list)
+
+
+# Tests that a missing checkpoint falls back to the nearest lower one
+@patch("app.services.math_service.set_cached_result")
+@patch("app.services.math_service.get_cached_result")
+def test_calculate_factorial_resumes_from_lower_checkpoint(mock_get, mock_set):
+    checkpoint_key = 'factorial_checkpoint:{"k": 256}'
+    mock_get.side_effect = lambda key: (
+        encode_value(math.factorial(256)) if key == checkpoint_key else None
+    )
+    with patch("app.services.math_service.range_product",
+               wraps=range_product) as mock_product:
+        assert asyncio.run(calculate_factorial(600)) == math.factorial(600)
+    assert mock_product.call_args_list[0].args == (257, 512)
+    stored = {call.args[0]: call.args[1] for call in mock_set.call_args_list}
+    assert decode_value(stored['factorial_checkpoint:{"k": 512}']) == (
+        math.factorial(512)
+    )
+
+
+# Tests that a cached factorial result just below n is resumed from
+@patch("app.services.math_service.set_cached_result")
+@patch("app.services.math_service.get_cached_result")
+def test_calculate_factorial_resumes_from_cached_result(mock_get, mock_set):
+    cached = {
+        'factorial:{"n": 998}': encode_value(math.factorial(998)),
+        'factorial_checkpoint:{"k": 768}': encode_value(math.factorial(768)),
+    }
+    mock_get.side_effect = lambda key: cached.get(key)
+    with patch("app.services.math_service.range_product",
+               wraps=range_product) as mock_product:
+        assert asyncio.run(calculate_factorial(1000)) == math.factorial(1000)
+    assert mock_product.call_args_list[0].args == (999, 1000)
+
+
+# Tests that a Fibonacci miss advances from a lower stored checkpoint
+@patch("app.services.math_service.set_cached_result")
+@patch("app.services.math_service.get_cached_result")
+def test_calculate_fibonacci_resumes_from_lower_checkpoint(mock_get, mock_set):
+    checkpoint_key = 'fibonacci_checkpoint:{"k": 256}'
+    mock_get.side_effect = lambda key: (
+        encode_value(list(fibonacci_pair(256)))
+        if key == checkpoint_key else None
+    )
+    with patch("app.services.math_service.fibonacci_pair",
+               wraps=fibonacci_pair) as mock_pair:
+        assert asyncio.run(calculate_fibonacci(600)) == (
+            fibonacci_pair(600)[0]
+        )
+    assert 512 not in [call.args[0] for call in mock_pair.call_args_list]
+
+
+# Tests that a Fibonacci miss stores its checkpoint pair and stays correct
+@patch("app.services.math_service.set_cached_result")
+@patch("app.services.math_service.get_cached_result", return_value=None)
+def test_calculate_fibonacci_stores_checkpoint(mock_get, mock_set):
+    assert asyncio.run(calculate_fibonacci(600)) == fibonacci_pair(600)[0]
+    stored = {call.args[0]: call.args[1] for call in mock_set.call_args_list}
+    assert decode_value(stored['fibonacci_checkpoint:{"k": 512}']) == list(
+        fibonacci_pair(512)
+    )
 
 
 # Tests that negative input raises ValueError in factorial()
@@ -40,26 +160,43 @@ def test_calculate_factorial_returns_correct_result(mock_get, mock_set):
 @patch("app.services.math_service.get_cached_result", return_value=None)
 def test_calculate_factorial_negative_raises(mock_get, mock_set):
     with pytest.raises(ValueError):
-        calculate_factorial(-10)
+        asyncio.run(calculate_factorial(-10))
 
 
 # Tests power function for int and float exponents
 @patch("app.services.math_service.set_cached_result")
 @patch("app.services.math_service.get_cached_result", return_value=None)
 def test_calculate_power_returns_correct_result(mock_get, mock_set):
-    assert calculate_power(2, 3) == 8
-    assert calculate_power(5, 0) == 1
-    assert calculate_power(9, 0.5) == 3
+    assert asyncio.run(calculate_power(2, 3)) == 8
+    assert asyncio.run(calculate_power(5, 0)) == 1
+    assert asyncio.run(calculate_power(9, 0.5)) == 3
+
+
+# Tests that vectorized power matches the scalar operator
+def test_calculate_power_array_matches_scalar():
+    bases = [2, 5, 9, -3, 0, 1e6]
+    exponents = [3, 0, 0.5, 3, 2, -1000]
+    results = calculate_power_array(np.array(bases), np.array(exponents))
+    assert results.tolist() == [b ** e for b, e in zip(bases, exponents)]
+
+
+# Tests that vectorized power rejects out-of-range and overflowing inputs
+@pytest.mark.parametrize("base, exponent", [
+    (2e6, 1), (2, 1001), (1e6, 1000), (0, -1), (-8, 0.5),
+])
+def test_calculate_power_array_rejects_invalid(base, exponent):
+    with pytest.raises(ValueError):
+        calculate_power_array(np.array([base]), np.array([exponent]))
 
 
 # Tests cache_or_compute calls compute and stores result
 @patch("app.services.math_service.set_cached_result")
 @patch("app.services.math_service.get_cached_result", return_value=None)
 def test_cache_or_compute_computes_and_caches(mock_get, mock_set):
-    def dummy_func():
+    async def dummy_func():
         return 123
 
-    result = cache_or_compute("test_op", {"x": 1}, dummy_func)
+    result = asyncio.run(cache_or_compute("test_op", {"x": 1}, dummy_func))
     assert result == 123
     mock_get.assert_called_once()
     mock_set.assert_called_once()
@@ -69,10 +206,77 @@ def test_cache_or_compute_computes_and_caches(mock_get, mock_set):
 @patch("app.services.math_service.set_cached_result")
 @patch("app.services.math_service.get_cached_result", return_value="456")
 def test_cache_or_compute_uses_cache(mock_get, mock_set):
-    def dummy_func():
+    async def dummy_func():
         return 999
 
-    result = cache_or_compute("test_op", {"x": 1}, dummy_func)
+    result = asyncio.run(cache_or_compute("test_op", {"x": 1}, dummy_func))
     assert result == 456
     mock_get.assert_called_once()
     mock_set.assert_not_called()
+
+
+# Tests that concurrent misses on one key share a single computation
+@patch("app.services.math_service.set_cached_result")
+@patch("app.services.math_service.get_cached_result", return_value=None)
+def test_cache_or_compute_coalesces_concurrent_misses(mock_get, mock_set):
+    calls = []
+
+    async def slow_func():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 7
+
+    async def run_concurrently():
+        return await asyncio.gather(*(
+            cache_or_compute("test_op", {"x": 2}, slow_func) for _ in range(5)
+        ))
+
+    assert asyncio.run(run_concurrently()) == [7] * 5
+    assert len(calls) == 1
+    mock_set.assert_called_once()
+
+
+# Tests that an expensive miss waits for another instance holding the lock
+@patch("app.services.math_service.release_lock")
+@patch("app.services.math_service.acquire_lock", return_value=None)
+@patch("app.services.math_service.set_cached_result")
+@patch("app.services.math_service.get_cached_result",
+       side_effect=[None, None, "42"])
+def test_cache_or_compute_waits_for_lock_holder(
+    mock_get, mock_set, mock_acquire, mock_release
+):
+    async def dummy_func():
+        return 999
+
+    with patch.object(settings, "SINGLE_FLIGHT_POLL_SECONDS", 0):
+        result = asyncio.run(cache_or_compute(
+            "test_op", {"x": 3}, dummy_func, cost=10**9
+        ))
+    assert result == 42
+    mock_set.assert_not_called()
+    mock_release.assert_not_called()
+
+
+# Tests that batch misses are computed with bounded concurrency
+@patch("app.services.math_service.set_cached_results")
+@patch("app.services.math_service.get_cached_results",
+       side_effect=lambda keys: [None] * len(keys))
+def test_calculate_batch_bounds_concurrency(mock_get, mock_set):
+    running, peak = 0, 0
+
+    async def tracked_factorial(n):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.001)
+        running -= 1
+        return n
+
+    operations = [("factorial", {"n": n}) for n in range(40)]
+    with patch.dict(
+        "app.services.math_service.COMPUTATIONS",
+        {"factorial": tracked_factorial},
+    ), patch.object(settings, "BATCH_COMPUTE_CONCURRENCY", 4):
+        results = asyncio.run(calculate_batch(operations))
+    assert results == list(range(40))
+    assert peak == 4
@@ -0,0 +1,226 @@
+import json
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base
+from app.db.models.log_model import Log
+from app.db.models.log_rollup_model import LogRollup
+from log_worker.worker import (
+    flush_logs,
+    parse_log_message,
+    start_log_worker,
+)
+
+
+# Builds a pub/sub message carrying a log payload
+def make_message(operation):
+    return {
+        "type": "message",
+        "data": json.dumps({
+            "event": "operation_completed",
+            "level": "INFO",
+            "user": "test_user",
+            "operation": operation,
+            "input": {"n": 5},
+            "result": "120",
+        }),
+    }
+
+
+# Returns a Redis client whose pub/sub yields messages, then a shutdown
+def make_client(messages):
+    pubsub = MagicMock()
+    pubsub.get_message.side_effect = [*messages, KeyboardInterrupt()]
+    client = MagicMock()
+    client.pubsub.return_value = pubsub
+    return client
+
+
+# Tests that a payload is mapped onto the logs table columns
+def test_parse_log_message():
+    row = parse_log_message(make_message("factorial")["data"])
+    assert row["operation"] == "factorial"
+    assert row["input"] == '{"n": 5}'
+    assert row["result"] == "120"
+    assert row["timestamp"] is not None
+
+
+# Tests that the publish time carried by a message is kept
+def test_parse_log_message_keeps_published_timestamp():
+    raw = json.dumps({"operation": "fib", "timestamp": "2024-01-01T10:00:00"})
+    assert parse_log_message(raw)["timestamp"].isoformat() \
+        == "2024-01-01T10:00:00"
+
+
+# Tests that messages are written in batches of LOG_BATCH_SIZE
+@patch("log_worker.worker.run_retention")
+@patch("log_worker.worker.init_db")
+@patch("log_worker.worker.flush_logs", side_effect=len)
+def test_worker_flushes_full_batches(
+    mock_flush, mock_init, mock_retention
+):
+    batches = []
+    mock_flush.side_effect = (
+        lambda rows: batches.append(list(rows)) or len(rows)
+    )
+    client = make_client([make_message("fib") for _ in range(5)])
+    with patch("log_worker.worker.settings.LOG_BATCH_SIZE", 2), \
+         patch("log_worker.worker.settings.LOG_FLUSH_INTERVAL_SECONDS", 60):
+        start_log_worker(client)
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+
+
+# Tests that rows still buffered at shutdown are flushed
+@patch("log_worker.worker.run_retention")
+@patch("log_worker.worker.init_db")
+@patch("log_worker.worker.flush_logs", side_effect=len)
+def test_worker_flushes_buffer_on_shutdown(
+    mock_flush, mock_init, mock_retention
+):
+    client = make_client([make_message("fib"), None, make_message("pow")])
+    with patch("log_worker.worker.settings.LOG_FLUSH_INTERVAL_SECONDS", 60):
+        start_log_worker(client)
+    mock_flush.assert_called_once()
+    assert [row["operation"] for row in mock_flush.call_args.args[0]] == [
+        "fib", "pow"
+    ]
+
+
+# Tests that a retention backlog is worked off between reads, one capped
+# pass per loop iteration, instead of in one long run
+@patch("log_worker.worker.run_retention")
+@patch("log_worker.worker.init_db")
+@patch("log_worker.worker.flush_logs", side_effect=len)
+def test_worker_interleaves_retention_backlog(
+    mock_flush, mock_init, mock_retention
+):
+    calls = []
+
+    def read(**kwargs):
+        calls.append("read")
+        if calls.count("read") > 4:
+            raise KeyboardInterrupt
+        return make_message("fib")
+
+    def retention():
+        calls.append("retention")
+        return calls.count("retention") < 3
+
+    client = make_client([])
+    client.pubsub.return_value.get_message.side_effect = read
+    mock_retention.side_effect = retention
+    with patch("log_worker.worker.settings.LOG_FLUSH_INTERVAL_SECONDS", 60):
+        start_log_worker(client)
+    assert calls == ["read", "retention"] * 3 + ["read", "read"]
+
+
+# Tests that stream entries are acknowledged only after their commit
+@patch("log_worker.worker.run_retention")
+@patch("log_worker.worker.init_db")
+@patch("log_worker.worker.flush_logs", side_effect=len)
+def test_worker_acks_stream_entries_after_flush(
+    mock_flush, mock_init, mock_retention
+):
+    entries = [
+        ("1-0", {"data": make_message("fib")["data"]}),
+        ("2-0", {"data": make_message("pow")["data"]}),
+    ]
+    client = MagicMock()
+    client.xautoclaim.return_value = ["0-0", [], []]
+    client.xreadgroup.side_effect = [
+        [["logs:stream", entries]],
+        KeyboardInterrupt(),
+    ]
+    with patch("log_worker.worker.settings.LOG_TRANSPORT", "streams"), \
+         patch("log_worker.worker.settings.LOG_BATCH_SIZE", 2):
+        start_log_worker(client)
+    client.xgroup_create.assert_called_once()
+    client.xack.assert_called_once_with(
+        "logs:stream", "log_workers", "1-0", "2-0"
+    )
+
+
+# Builds a log row as parse_log_message returns it
+def make_row(result):
+    return {
+        "event": "operation_completed",
+        "level": "INFO",
+        "timestamp": datetime(2024, 1, 1, 10, 0),
+        "user": "test_user",
+        "operation": "fib",
+        "input": "{}",
+        "result": result,
+    }
+
+
+# Tests that a row the database rejects is dead-lettered and the rest of
+# its batch is still written
+def test_flush_logs_dead_letters_rejected_rows(tmp_path):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(
+        engine, tables=[Log.__table__, LogRollup.__table__]
+    )
+    rows = [make_row("1"), make_row({"a": 1}), make_row("3")]
+    dead_letter_path = tmp_path / "dead.ndjson"
+    with patch("log_worker.worker.SessionLocal",
+               sessionmaker(bind=engine)), \
+         patch("log_worker.worker.settings.LOG_DEAD_LETTER_PATH",
+               str(dead_letter_path)):
+        assert flush_logs(rows) == 3
+    with sessionmaker(bind=engine)() as db:
+        assert [log.result for log in db.query(Log).order_by(Log.id)] == [
+            "1", "3"
+        ]
+    dead = dead_letter_path.read_text().splitlines()
+    assert [json.loads(line)["result"] for line in dead] == [{"a": 1}]
+
+
+# Tests that rows are kept for a retry while the database is unavailable
+@patch("log_worker.worker.write_logs",
+       side_effect=OperationalError("INSERT", {}, Exception("locked")))
+def test_flush_logs_keeps_rows_while_database_unavailable(mock_write):
+    assert flush_logs([make_row("1"), make_row("2")]) == 0
+    mock_write.assert_called_once()
+
+
+# Tests that pub/sub messages beyond the buffer cap are dropped while the
+# database is down
+@patch("log_worker.worker.run_retention", return_value=False)
+@patch("log_worker.worker.init_db")
+@patch("log_worker.worker.flush_logs", return_value=0)
+def test_worker_caps_buffer_while_database_down(
+    mock_flush, mock_init, mock_retention
+):
+    client = make_client([make_message("fib") for _ in range(5)])
+    with patch("log_worker.worker.settings.LOG_BUFFER_MAX_ROWS", 2), \
+         patch("log_worker.worker.settings.LOG_FLUSH_INTERVAL_SECONDS", 0):
+        start_log_worker(client)
+    assert max(len(call.args[0]) for call in mock_flush.call_args_list) == 2
+
+
+# Tests that stream reads pause while the buffer is full, leaving entries
+# unacknowledged in the stream
+@patch("log_worker.worker.run_retention", return_value=False)
+@patch("log_worker.worker.init_db")
+@patch("log_worker.worker.flush_logs", return_value=0)
+def test_worker_pauses_stream_reads_when_buffer_full(
+    mock_flush, mock_init, mock_retention
+):
+    entries = [
+        ("1-0", {"data": make_message("fib")["data"]}),
+        ("2-0", {"data": make_message("pow")["data"]}),
+    ]
+    client = MagicMock()
+    client.xautoclaim.return_value = ["0-0", [], []]
+    client.xreadgroup.return_value = [["logs:stream", entries]]
+    with patch("log_worker.worker.settings.LOG_TRANSPORT", "streams"), \
+         patch("log_worker.worker.settings.LOG_BUFFER_MAX_ROWS", 2), \
+         patch("log_worker.worker.time.sleep",
+               side_effect=KeyboardInterrupt):
+        start_log_worker(client)
+    client.xreadgroup.assert_called_once()
+    client.xack.assert_not_called()